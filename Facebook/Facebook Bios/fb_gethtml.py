@@ -1,4 +1,7 @@
 import os
+import re
+import sys
+import gzip
 import time
 import json
 import random
@@ -16,10 +19,30 @@ from selenium.common.exceptions import (
     StaleElementReferenceException,
 )
 
+import fb_scrape
+
+# The refresh registry is shared with the X fetcher and lives in ../../Twitter/Twitter Bios
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Twitter', 'Twitter Bios'))
+import profile_registry
+
 # === CONFIGURATION ===
 INPUT_FILE = 'profiles.txt'  # one username per line
 OUTPUT_DIR = 'fb_profiles_html'
 BASE_URL = 'https://www.facebook.com/'
+READY_TIMEOUT = 15  # max seconds to wait for a profile header to render
+SCROLL_TIMEOUT = 4  # max seconds to wait for the Intro card after scrolling
+LOGIN_TIMEOUT = 120  # max seconds to wait for login (and any manual CAPTCHA) to finish
+# Snapshots: keep only the profile column instead of the whole page_source.
+SNAPSHOT_MODE = True
+SNAPSHOT_MINIFY = True  # also drop scripts, styles, class/style attributes and SVG paths
+SNAPSHOT_COMPRESSION = 'gzip'  # 'gzip', 'zstd' (needs the zstandard package) or None
+SNAPSHOT_ROOT = '[role="main"]'
+SNAPSHOT_DROP = ['[role="feed"]']  # emptied in place: the posts below the header and Intro card
+# JSON payload scripts kept in the snapshot when they contain one of these keys (read by fb_scrape)
+SNAPSHOT_KEEP_SCRIPTS = ['profile_header_renderer', 'profile_social_context', 'profile_intro_card']
+# Refresh registry: refetch a saved profile once its TTL (see profile_registry) is up.
+REGISTRY_DB = 'profile_registry.sqlite3'  # None: only fetch profiles that were never saved
+MAX_PROFILES_PER_RUN = None  # cap on fetches per run; the most overdue go first
 
 # === CREDENTIALS ===
 # secrets.py file with your Facebook credentials:
@@ -87,6 +110,74 @@ def sleep_with_heartbeat(driver, total_seconds: int, tick: int = 15):
             pass
 
 
+def wait_until_ready(driver, condition, timeout, fallback_seconds, what="page"):
+    """
+    Wait until condition(driver) is truthy, polling every 0.25s. If it does not
+    happen within timeout, fall back to a fixed sleep of fallback_seconds so
+    a changed layout degrades to the old behaviour instead of failing.
+    Returns True if the condition was met.
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(condition)
+        return True
+    except TimeoutException:
+        print(f"  [WAIT] {what} not ready after {timeout}s; falling back to a {fallback_seconds}s wait.")
+        time.sleep(fallback_seconds)
+        return False
+
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+# Facebook's notice for a deleted, renamed or restricted profile
+UNAVAILABLE_XPATH = ('//span[contains(., "isn\'t available") or contains(., "isn\u2019t available") '
+                     'or contains(., "Isn\'t Available") or contains(., "Isn\u2019t Available")]')
+
+
+def profile_ready(driver):
+    """Profile name rendered and a followers/following/friends count filled in (or the profile is unavailable)."""
+    try:
+        if driver.find_elements(By.XPATH, UNAVAILABLE_XPATH):
+            return True
+        if not any((h1.text or '').strip() for h1 in driver.find_elements(By.TAG_NAME, "h1")):
+            return False
+        links = driver.find_elements(
+            By.XPATH, '//a[contains(@href, "followers") or contains(@href, "following") or contains(@href, "friends")]')
+        return any(re.search(r'\d', link.text or '') for link in links)
+    except StaleElementReferenceException:
+        return False
+
+
+def intro_ready(driver):
+    """The lazily loaded Intro card is in the DOM."""
+    return bool(driver.find_elements(By.XPATH, '//span[normalize-space()="Intro"]'))
+
+
+def page_state(driver):
+    """
+    What a loaded profile URL shows: 'profile' (a name in the main column,
+    with or without a follower count), 'gone' (Facebook's "isn't available"
+    notice), or None when neither rendered (a timeout, a login wall or
+    checkpoint), which is a failed fetch.
+    """
+    try:
+        if not left_login_page(driver):
+            return None
+        if any((h1.text or '').strip() for h1 in driver.find_elements(By.XPATH, '//*[@role="main"]//h1')):
+            return 'profile'
+        if driver.find_elements(By.XPATH, UNAVAILABLE_XPATH):
+            return 'gone'
+    except StaleElementReferenceException:
+        pass
+    return None
+
+
+def left_login_page(driver):
+    url = (driver.current_url or '').lower()
+    return not any(part in url for part in ('/login', 'checkpoint', 'two_step_verification'))
+
+
 def save_cookies(driver, filename):
     cookies = driver.get_cookies()
     with open(filename, "w", encoding="utf-8") as f:
@@ -119,7 +210,6 @@ def perform_login(driver):
     Logs into Facebook and waits for manual CAPTCHA completion.
     """
     driver.get("https://www.facebook.com/login")
-    time.sleep(3)
 
     try:
         # Enter email
@@ -141,20 +231,115 @@ def perform_login(driver):
         login_button.click()
         
         print("✓ Login credentials submitted.")
-        print("⏳ Waiting 30 seconds for you to complete any CAPTCHA manually...")
+        print(f"⏳ Waiting up to {LOGIN_TIMEOUT} seconds for you to complete any CAPTCHA manually...")
         print("   Please solve the CAPTCHA in the browser window if it appears.")
         
-        # Wait for manual CAPTCHA completion
-        time.sleep(30)
+        # Continue as soon as Facebook redirects away from the login/checkpoint pages
+        wait_until_ready(driver, left_login_page, LOGIN_TIMEOUT, 0, what="login")
         
         print("✓ Login process complete!")
-        sleep_with_heartbeat(driver, 5, tick=2)
         
     except Exception as e:
         print(f"[ERROR] Login failed: {e}")
         raise
 
 
+# ===============================
+# Snapshots
+# ===============================
+SNAPSHOT_EXTENSIONS = {None: '.html', 'gzip': '.html.gz', 'zstd': '.html.zst'}
+
+# Copies the root subtree, empties the dropped parts, appends the profile's
+# JSON payloads and rebuilds the chain of ancestors with an empty placeholder
+# for every earlier sibling, so absolute XPaths into the page still resolve.
+SNAPSHOT_JS = """
+const [rootSelector, dropSelectors, minify, keepScripts] = arguments;
+const root = document.querySelector(rootSelector);
+if (!root) return null;
+const clean = (el) => { if (minify) { el.removeAttribute('style'); el.removeAttribute('class'); } };
+const copy = root.cloneNode(true);
+for (const sel of dropSelectors) copy.querySelectorAll(sel).forEach(el => el.replaceChildren());
+if (minify) {
+  copy.querySelectorAll('script, style, noscript, link, meta, template').forEach(el => el.remove());
+  copy.querySelectorAll('svg').forEach(el => el.replaceChildren());
+  [copy, ...copy.querySelectorAll('*')].forEach(clean);
+}
+for (const script of document.querySelectorAll('script[type="application/json"]')) {
+  if (keepScripts.some(key => script.textContent.includes(key))) copy.appendChild(script.cloneNode(true));
+}
+let node = copy, original = root;
+while (original.parentElement) {
+  const parent = original.parentElement;
+  const shell = parent.cloneNode(false);
+  clean(shell);
+  for (const sibling of parent.children) {
+    if (sibling === original) break;
+    shell.appendChild(document.createElement(sibling.tagName.toLowerCase()));
+  }
+  shell.appendChild(node);
+  node = shell;
+  original = parent;
+}
+return node.outerHTML;
+"""
+
+
+def find_saved_page(user_dir, username):
+    """Path of an already saved page or snapshot for username, or None."""
+    for ext in SNAPSHOT_EXTENSIONS.values():
+        path = os.path.join(user_dir, username + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def page_html(driver):
+    """The trimmed profile column in snapshot mode, otherwise (or if it is missing) the full page."""
+    if not SNAPSHOT_MODE:
+        return driver.page_source
+    html = driver.execute_script(SNAPSHOT_JS, SNAPSHOT_ROOT, SNAPSHOT_DROP, SNAPSHOT_MINIFY, SNAPSHOT_KEEP_SCRIPTS)
+    if not html:
+        print(f"  [WARN] {SNAPSHOT_ROOT} not found; saving the full page.")
+        return driver.page_source
+    if SNAPSHOT_MINIFY:
+        html = re.sub(r'>\s+<', '><', html)
+    return '<!DOCTYPE html>' + html
+
+
+def write_snapshot(path, html, compression=SNAPSHOT_COMPRESSION):
+    """Write (and compress) html via a temp file, so a crash never leaves a partial page."""
+    data = html.encode('utf-8')
+    if compression == 'gzip':
+        data = gzip.compress(data, compresslevel=9)
+    elif compression == 'zstd':
+        import zstandard
+        data = zstandard.ZstdCompressor(level=19).compress(data)
+    tmp_path = path + '.part'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# ===============================
+# Refresh registry
+# ===============================
+def register_profile(registry, username, path, fetched_at=None):
+    """Parse a saved profile and record it in the registry. Returns True if it changed."""
+    fields = fb_scrape.extract_profile_data(path, username)
+    if fields is None:
+        return False
+    return profile_registry.record_fetch(registry, username, fields, 'Intro', fetched_at)
+
+
+def seed_registry(registry, usernames):
+    """Register profiles saved before the registry existed, dated by their file's mtime."""
+    known = profile_registry.known_accounts(registry)
+    for username in usernames:
+        path = find_saved_page(os.path.join(OUTPUT_DIR, username), username)
+        if path and username not in known:
+            register_profile(registry, username, path, fetched_at=os.path.getmtime(path))
+
+
 def extract_username_from_url(url_or_username):
     """
     Extract username from Facebook URL or return as-is if already a username.
@@ -201,6 +386,15 @@ def fetch_profiles():
 
     print(f"[INFO] Found {len(usernames)} profiles to fetch.")
 
+    registry = profile_registry.open_registry(REGISTRY_DB) if REGISTRY_DB else None
+    if registry is not None:
+        seed_registry(registry, usernames)
+        usernames = profile_registry.due_accounts(registry, usernames, limit=MAX_PROFILES_PER_RUN)
+        print(f"[INFO] {len(usernames)} profiles are due for a fetch.")
+        if not usernames:
+            registry.close()
+            return
+
     driver = setup_driver()
     
     try:
@@ -212,7 +406,7 @@ def fetch_profiles():
                 load_cookies(driver, cookie_file)
                 # Verify we're still logged in
                 driver.get("https://www.facebook.com")
-                time.sleep(3)
+                wait_until_ready(driver, document_ready, 10, 3, what="home page")
                 # Quick check if logged in (look for home page elements)
                 if "login" in driver.current_url.lower():
                     raise Exception("Cookies expired, need to re-login")
@@ -236,11 +430,10 @@ def fetch_profiles():
             if not os.path.exists(user_dir):
                 os.makedirs(user_dir)
             
-            outfile = os.path.join(user_dir, f"{username}.html")
-            
-            if os.path.exists(outfile):
+            if registry is None and find_saved_page(user_dir, username):
                 print(f"  [SKIP] {username} already downloaded.")
                 continue
+            outfile = os.path.join(user_dir, username + SNAPSHOT_EXTENSIONS[SNAPSHOT_COMPRESSION])
 
             url = f"{BASE_URL}{username}"
             print(f"  [FETCHING] {url}")
@@ -248,21 +441,43 @@ def fetch_profiles():
             try:
                 safe_get(driver, url)
                 
-                # Wait for page to load
-                time.sleep(5)
+                # Wait for the header and follower counts to render
+                wait_until_ready(driver, profile_ready, READY_TIMEOUT, 5, what=username)
                 
-                # Scroll to load dynamic content
+                # Scroll to load dynamic content (the Intro card), then back up;
+                # page_source reads the DOM, so no pause is needed after scrolling back
                 driver.execute_script("window.scrollTo(0, 800);")
-                time.sleep(2)
+                wait_until_ready(driver, intro_ready, SCROLL_TIMEOUT, 2, what=f"{username} intro")
                 driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(2)
-
-                # Save HTML
-                html = driver.page_source
-                with open(outfile, 'w', encoding='utf-8') as f:
-                    f.write(html)
 
-                print(f"  ✓ [SAVED] {outfile}")
+                # A page that did not load (timeout, login wall) keeps the last snapshot and
+                # is not recorded, so the profile stays due for a retry. A profile without a
+                # follower count, or one that is gone, is saved with that status and
+                # refetched less often (profile_registry.STATUS_TTL_DAYS)
+                state = page_state(driver)
+                if state is None:
+                    print(f"  [WARN] Profile did not load; keeping the last snapshot for a retry.")
+                    human_sleep(base=3.0, jitter=2.0)
+                    continue
+                html = page_html(driver)
+                fields = fb_scrape.extract_from_html(html, username)
+                status = 'gone' if state == 'gone' else 'ok' if fields.get('Followers') else 'no_count'
+
+                if status == 'gone' and find_saved_page(user_dir, username):
+                    # the last snapshot shows the profile as it was; the registry records that it is gone
+                    print(f"  [GONE] {username}: profile unavailable; keeping the last snapshot.")
+                else:
+                    # Save HTML (or the trimmed snapshot); a refresh in a different format replaces the older copy
+                    write_snapshot(outfile, html)
+                    for ext in SNAPSHOT_EXTENSIONS.values():
+                        stale = os.path.join(user_dir, username + ext)
+                        if stale != outfile and os.path.exists(stale):
+                            os.remove(stale)
+                    print(f"  ✓ [SAVED] {outfile}" if status == 'ok' else f"  ✓ [SAVED] {outfile} ({status})")
+
+                if registry is not None and profile_registry.record_fetch(registry, username, fields, 'Intro',
+                                                                          status=status):
+                    print(f"  [CHANGED] {username}")
                 
                 # Random delay between profiles to avoid rate limiting
                 human_sleep(base=3.0, jitter=2.0)
@@ -274,6 +489,8 @@ def fetch_profiles():
     finally:
         print("\n[INFO] Closing browser...")
         driver.quit()
+        if registry is not None:
+            registry.close()
         print("✓ Done!")
 
 
@@ -1,15 +1,22 @@
 import os
+import re
 import csv
+import json
+import gzip
 from lxml import html
 
 # === CONFIGURATION ===
 HTML_DIR = 'fb_profiles_html'
 OUTPUT_FILE = 'fb_bios.csv'
+# Try the Relay payloads first, XPaths for whatever they lack. Off until JSON_KEYS
+# are checked against a real profile page_source (see below).
+USE_EMBEDDED_JSON = False
 
 # XPaths for Facebook profile data
 XPATHS = {
     'Username': '//*[@id="mount_0_0_tE"]/div/div[1]/div/div[3]/div/div/div[1]/div[1]/div/div/div[1]/div[2]/div/div/div/div[3]/div/div/div[1]/div/div/span/h1/text()',
-    'Username_Alt': '//h1/text()',  # Fallback
+    # Fallback; only inside the main column, or the Notifications panel's <h1> wins
+    'Username_Alt': '//*[@role="main"]//h1/text()',
     
     'Followers': '//*[@id="mount_0_0_tE"]/div/div[1]/div/div[3]/div/div/div[1]/div[1]/div/div/div[1]/div[2]/div/div/div/div[3]/div/div/div[2]/span/a[1]/strong/text()',
     'Followers_Alt': '//a[contains(@href, "/followers")]/strong/text()',  # Fallback
@@ -21,6 +28,112 @@ XPATHS = {
     'Intro_Alt': '//div[contains(@class, "intro")]//span/text()',  # Fallback
 }
 
+# Full pages and fb_gethtml snapshots (plain, gzip or zstd)
+HTML_EXTENSIONS = ('.html', '.html.gz', '.html.zst')
+
+
+def read_html(filepath):
+    """Return the HTML text of a saved page, decompressing .gz/.zst snapshots."""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    if filepath.endswith('.gz'):
+        data = gzip.decompress(data)
+    elif filepath.endswith('.zst'):
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data.decode('utf-8')
+
+
+# Keys of the Relay payloads (<script type="application/json">) expected to hold
+# the profile header, the follower/following line and the Intro card. Not yet
+# checked against a real profile capture: none of the pages in fb_profiles_html
+# contain them (they are home-feed captures). Before turning USE_EMBEDDED_JSON
+# on, save a profile's page_source with fb_gethtml, confirm these keys in it and
+# keep it as a fixture. Where they are absent every field comes from the
+# XPaths, and main() warns that the JSON supplied nothing.
+JSON_KEYS = {
+    'header': 'profile_header_renderer',
+    'social': 'profile_social_context',
+    'intro': 'profile_intro_card',
+}
+SOCIAL_COUNT_RE = re.compile(r'(\d[\d.,]*\s*[KM]?)\s+(followers|following)\b', re.IGNORECASE)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def iter_json_values(content, key):
+    """
+    Yield each value stored under "key": in the page's embedded JSON. Only that
+    value is decoded (raw_decode from just after the key), never the whole
+    multi-megabyte payload or the page's HTML.
+    """
+    marker = f'"{key}":'
+    start = content.find(marker)
+    while start != -1:
+        pos = start + len(marker)
+        # raw_decode does not skip leading whitespace itself ("key": {...})
+        while content[pos:pos + 1].isspace():
+            pos += 1
+        try:
+            value, pos = _JSON_DECODER.raw_decode(content, pos)
+        except ValueError:
+            pass
+        else:
+            yield value
+        start = content.find(marker, pos)
+
+
+def _first(obj, key):
+    """Depth-first search of decoded JSON for the first value under key."""
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if key in item:
+                return item[key]
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+    return None
+
+
+def _strings(obj):
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            yield from _strings(value)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from _strings(value)
+
+
+def extract_from_json(content):
+    """
+    Profile fields from the embedded Relay payloads under JSON_KEYS, as raw
+    strings. Returns only the fields it found (possibly none), e.g.
+    {'Username': 'Paul Kagame', 'Followers': '1.5M', 'Following': '0', 'Intro': '...'}
+    """
+    data = {}
+    for header in iter_json_values(content, JSON_KEYS['header']):
+        user = _first(header, 'user')
+        name = user.get('name') if isinstance(user, dict) else None
+        if isinstance(name, str) and name.strip():
+            data['Username'] = name.strip()
+            break
+    for context in iter_json_values(content, JSON_KEYS['social']):
+        for text in _strings(context):
+            for count, kind in SOCIAL_COUNT_RE.findall(text):
+                data.setdefault(kind.capitalize(), count.replace(' ', ''))
+        if 'Followers' in data:
+            break
+    for card in iter_json_values(content, JSON_KEYS['intro']):
+        bio = _first(card, 'bio')
+        text = bio.get('text') if isinstance(bio, dict) else bio
+        if isinstance(text, str) and text.strip():
+            data['Intro'] = text.strip()
+            break
+    return data
+
 
 def clean_number(text):
     """
@@ -76,51 +189,64 @@ def extract_with_fallback(tree, primary_xpath, fallback_xpath):
     return ''
 
 
-def extract_profile_data(filepath, username_from_dir):
+def extract_profile_data(filepath, username_from_dir, sources=None):
     """
     Extract Facebook profile data from saved HTML file.
+    The embedded JSON is tried first; the page is only parsed with lxml for
+    fields the JSON did not have. If sources is a dict, it is filled with
+    where each field came from: 'json', 'xpath' or '' (not found).
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        tree = html.fromstring(content)
-        data = {}
-        
-        # Username from directory name as fallback
-        data['Account'] = username_from_dir
-        
-        # Extract username (display name)
-        username = extract_with_fallback(tree, XPATHS['Username'], XPATHS['Username_Alt'])
-        data['Username'] = username if username else username_from_dir
-        
-        # Extract followers
-        followers = extract_with_fallback(tree, XPATHS['Followers'], XPATHS['Followers_Alt'])
-        data['Followers'] = clean_number(followers)
-        
-        # Extract following
-        following = extract_with_fallback(tree, XPATHS['Following'], XPATHS['Following_Alt'])
-        data['Following'] = clean_number(following)
-        
-        # Extract intro/bio
-        intro = extract_with_fallback(tree, XPATHS['Intro'], XPATHS['Intro_Alt'])
-        # If intro is actually a list of text nodes, join them
-        if not intro:
-            try:
-                intro_nodes = tree.xpath(XPATHS['Intro'])
-                if intro_nodes:
-                    intro = ' '.join(node.strip() for node in intro_nodes if isinstance(node, str) and node.strip())
-            except Exception:
-                pass
-        data['Intro'] = intro
-
-        return data
-        
+        return extract_from_html(read_html(filepath), username_from_dir, sources)
     except Exception as e:
         print(f"[ERROR] Failed to parse {filepath}: {e}")
         return None
 
 
+def extract_from_html(content, username_from_dir, sources=None):
+    """The fields of extract_profile_data from page HTML already in memory (e.g. a fresh fetch)."""
+    found = extract_from_json(content) if USE_EMBEDDED_JSON else {}
+    if all(key in found for key in ('Username', 'Followers', 'Following', 'Intro')):
+        tree = None
+    else:
+        tree = html.fromstring(content)
+    data = {}
+    
+    # Username from directory name as fallback
+    data['Account'] = username_from_dir
+    
+    # Extract username (display name)
+    username = found.get('Username') or extract_with_fallback(tree, XPATHS['Username'], XPATHS['Username_Alt'])
+    data['Username'] = username if username else username_from_dir
+    
+    # Extract followers
+    followers = found.get('Followers') or extract_with_fallback(tree, XPATHS['Followers'], XPATHS['Followers_Alt'])
+    data['Followers'] = clean_number(followers)
+    
+    # Extract following
+    following = found.get('Following') or extract_with_fallback(tree, XPATHS['Following'], XPATHS['Following_Alt'])
+    data['Following'] = clean_number(following)
+    
+    # Extract intro/bio
+    intro = found.get('Intro') or extract_with_fallback(tree, XPATHS['Intro'], XPATHS['Intro_Alt'])
+    # If intro is actually a list of text nodes, join them
+    if not intro:
+        try:
+            intro_nodes = tree.xpath(XPATHS['Intro'])
+            if intro_nodes:
+                intro = ' '.join(node.strip() for node in intro_nodes if isinstance(node, str) and node.strip())
+        except Exception:
+            pass
+    data['Intro'] = intro
+
+    if sources is not None:
+        for key in ('Username', 'Followers', 'Following', 'Intro'):
+            sources[key] = 'json' if found.get(key) else 'xpath' if data[key] else ''
+        if not username:
+            sources['Username'] = ''
+    return data
+
+
 def main():
     """
     Main function to scrape all saved Facebook profile HTMLs.
@@ -136,12 +262,13 @@ def main():
     print(f"[INFO] Found {len(user_dirs)} user directories to process.")
 
     all_data = []
+    json_pages = 0
     
     for user_dir in user_dirs:
         user_path = os.path.join(HTML_DIR, user_dir)
         
         # Find HTML file in user directory
-        html_files = [f for f in os.listdir(user_path) if f.endswith('.html')]
+        html_files = [f for f in os.listdir(user_path) if f.endswith(HTML_EXTENSIONS)]
         
         if not html_files:
             print(f"[WARN] No HTML file found in {user_dir}")
@@ -153,13 +280,20 @@ def main():
         
         print(f"[PROCESSING] {user_dir}/{html_file}")
         
-        data = extract_profile_data(filepath, user_dir)
+        sources = {}
+        data = extract_profile_data(filepath, user_dir, sources)
         if data:
             all_data.append(data)
+            json_pages += 'json' in sources.values()
             print(f"  ✓ Extracted: {data['Username']} | Followers: {data['Followers']} | Following: {data['Following']}")
         else:
             print(f"  ✗ Failed to extract data")
 
+    if USE_EMBEDDED_JSON and all_data:
+        print(f"[INFO] Embedded JSON supplied fields on {json_pages} of {len(all_data)} pages.")
+        if not json_pages:
+            print("[WARN] No page had the JSON_KEYS payloads; every field came from the XPaths.")
+
     # Write to CSV
     if all_data:
         fieldnames = ['Account', 'Username', 'Followers', 'Following', 'Intro']
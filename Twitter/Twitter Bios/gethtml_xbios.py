@@ -2,6 +2,9 @@ import os
 import time
 import json
 import re
+import gzip
+import queue
+import threading
 from datetime import datetime, timezone
 from selenium import webdriver
 from seleniumbase import SB
@@ -19,10 +22,29 @@ from selenium.common.exceptions import (
 )
 from selenium import webdriver  # (kept for type hints; not used to create the browser)
 
+import profile_registry
+import scrapexbios
+
 # === CONFIGURATION ===
 INPUT_FILE = 'xAccounts.txt'  # one username per line
 OUTPUT_DIR = 'profiles_html'
 BASE_URL = 'https://twitter.com/'
+NUM_WORKERS = 3  # browsers fetching in parallel
+# Optional cookie jars (saved with save_cookies); worker i uses COOKIE_FILES[i % len(COOKIE_FILES)].
+# Leave empty to browse logged out.
+COOKIE_FILES = []
+MIN_SECONDS_BETWEEN_REQUESTS = 2.0  # global pace across all workers
+READY_TIMEOUT = 15  # max seconds to wait for a profile to render
+LOAD_FALLBACK_SECONDS = 5  # fixed wait used when the readiness check times out
+# Snapshots: keep only the profile header instead of the whole ~330 KB page_source.
+SNAPSHOT_MODE = True
+SNAPSHOT_MINIFY = True  # also drop scripts, styles, class/style attributes and SVG paths
+SNAPSHOT_COMPRESSION = 'gzip'  # 'gzip', 'zstd' (needs the zstandard package) or None
+SNAPSHOT_ROOT = '[data-testid="primaryColumn"]'
+SNAPSHOT_DROP = ['[aria-label^="Timeline"]']  # emptied in place: the tweets below the header
+# Refresh registry: refetch a saved profile once its TTL (see profile_registry) is up.
+REGISTRY_DB = 'profile_registry.sqlite3'  # None: only fetch profiles that were never saved
+MAX_PROFILES_PER_RUN = None  # cap on fetches per run; the most overdue go first
 
 
 def setup_driver():
@@ -89,6 +111,61 @@ def sleep_with_heartbeat(driver, total_seconds: int, tick: int = 15):
         except Exception:
             pass
 
+# ===============================
+# Readiness waits
+# ===============================
+def wait_until_ready(driver, condition, timeout, fallback_seconds, what="page"):
+    """
+    Wait until condition(driver) is truthy, polling every 0.25s. If it does not
+    happen within timeout, fall back to a fixed sleep of fallback_seconds so
+    a changed layout degrades to the old behaviour instead of failing.
+    Returns True if the condition was met.
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(condition)
+        return True
+    except TimeoutException:
+        print(f"[WAIT] {what} not ready after {timeout}s; falling back to a {fallback_seconds}s wait.")
+        time.sleep(fallback_seconds)
+        return False
+
+
+def profile_ready(driver):
+    """Profile header rendered and its follower count filled in (or X says the account does not exist)."""
+    try:
+        if driver.find_elements(By.CSS_SELECTOR, '[data-testid="emptyState"]'):
+            return True
+        if not driver.find_elements(By.CSS_SELECTOR, '[data-testid="UserName"]'):
+            return False
+        links = driver.find_elements(By.CSS_SELECTOR, 'a[href$="/followers"], a[href$="/verified_followers"]')
+        return any(re.search(r'\d', link.text or '') for link in links)
+    except StaleElementReferenceException:
+        return False
+
+
+def page_state(driver):
+    """
+    What a loaded profile URL shows: 'profile' (the header rendered, with or
+    without a follower count), 'gone' (X's emptyState with no header: the
+    account is suspended or does not exist), or None when neither rendered
+    (a timeout or login wall), which is a failed fetch.
+    """
+    try:
+        if not left_login_page(driver):
+            return None
+        if driver.find_elements(By.CSS_SELECTOR, '[data-testid="UserName"]'):
+            return 'profile'
+        if driver.find_elements(By.CSS_SELECTOR, '[data-testid="emptyState"]'):
+            return 'gone'
+    except StaleElementReferenceException:
+        pass
+    return None
+
+
+def left_login_page(driver):
+    url = (driver.current_url or '').lower()
+    return '/login' not in url and '/i/flow/' not in url
+
 # ===============================
 # Login helpers
 # ===============================
@@ -143,8 +220,8 @@ def perform_login(driver):
     )
     password_input.send_keys(PASSWORD)
     password_input.send_keys(Keys.RETURN)
+    wait_until_ready(driver, left_login_page, READY_TIMEOUT, 5, what="login")
     print(" Login successful!")
-    sleep_with_heartbeat(driver, 5, tick=2)
 
     # ---------- account-aware helpers ----------
 def clear_twitter_site_data(driver):
@@ -204,34 +281,231 @@ def is_logged_in_as(driver, expected_handle: str) -> bool:
         print(f"Detected logged-in handle: @{actual}")
     return (actual == (expected_handle or "").lower())
 
-def fetch_profiles():
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
+# ===============================
+# Snapshots
+# ===============================
+SNAPSHOT_EXTENSIONS = {None: '.html', 'gzip': '.html.gz', 'zstd': '.html.zst'}
 
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        usernames = [line.strip() for line in f if line.strip()]
+# Copies the root subtree, empties the dropped parts and rebuilds the chain of
+# ancestors with an empty placeholder for every earlier sibling, so absolute
+# XPaths like //*[@id="react-root"]/div/div/div[2]/main/... still resolve.
+SNAPSHOT_JS = """
+const [rootSelector, dropSelectors, minify] = arguments;
+const root = document.querySelector(rootSelector);
+if (!root) return null;
+const clean = (el) => { if (minify) { el.removeAttribute('style'); el.removeAttribute('class'); } };
+const copy = root.cloneNode(true);
+for (const sel of dropSelectors) copy.querySelectorAll(sel).forEach(el => el.replaceChildren());
+if (minify) {
+  copy.querySelectorAll('script, style, noscript, link, meta, template').forEach(el => el.remove());
+  copy.querySelectorAll('svg').forEach(el => el.replaceChildren());
+  [copy, ...copy.querySelectorAll('*')].forEach(clean);
+}
+let node = copy, original = root;
+while (original.parentElement) {
+  const parent = original.parentElement;
+  const shell = parent.cloneNode(false);
+  clean(shell);
+  for (const sibling of parent.children) {
+    if (sibling === original) break;
+    shell.appendChild(document.createElement(sibling.tagName.toLowerCase()));
+  }
+  shell.appendChild(node);
+  node = shell;
+  original = parent;
+}
+return node.outerHTML;
+"""
 
-    driver = setup_driver()
 
+def snapshot_path(username, compression=SNAPSHOT_COMPRESSION):
+    return os.path.join(OUTPUT_DIR, username + SNAPSHOT_EXTENSIONS[compression])
+
+
+def saved_path(username):
+    """Path of the saved page or snapshot for username in any supported format, or None."""
+    for ext in SNAPSHOT_EXTENSIONS.values():
+        path = os.path.join(OUTPUT_DIR, username + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def page_html(driver):
+    """The trimmed profile header in snapshot mode, otherwise (or if the header is missing) the full page."""
+    if not SNAPSHOT_MODE:
+        return driver.page_source
+    html = driver.execute_script(SNAPSHOT_JS, SNAPSHOT_ROOT, SNAPSHOT_DROP, SNAPSHOT_MINIFY)
+    if not html:
+        print(f"[WARN] {SNAPSHOT_ROOT} not found; saving the full page.")
+        return driver.page_source
+    if SNAPSHOT_MINIFY:
+        html = re.sub(r'>\s+<', '><', html)
+    return '<!DOCTYPE html>' + html
+
+
+def write_snapshot(path, html, compression=SNAPSHOT_COMPRESSION):
+    """Write (and compress) html via a temp file, so a crash never leaves a partial page."""
+    data = html.encode('utf-8')
+    if compression == 'gzip':
+        data = gzip.compress(data, compresslevel=9)
+    elif compression == 'zstd':
+        import zstandard
+        data = zstandard.ZstdCompressor(level=19).compress(data)
+    tmp_path = path + '.part'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# ===============================
+# Refresh registry
+# ===============================
+REGISTRY_LOCK = threading.Lock()
+
+
+def record_profile(registry, username, fields, fetched_at=None, status=None):
+    """Record extracted fields in the registry. Returns True if they changed."""
+    with REGISTRY_LOCK:
+        return profile_registry.record_fetch(registry, username, fields, 'Bio', fetched_at, status)
+
+
+def register_profile(registry, username, path, fetched_at=None):
+    """Parse a saved profile and record it in the registry. Returns True if it changed."""
+    fields = scrapexbios.extract_profile_data(path)
+    if fields is None:
+        return False
+    return record_profile(registry, username, fields, fetched_at)
+
+
+def seed_registry(registry, usernames):
+    """Register profiles saved before the registry existed, dated by their file's mtime."""
+    known = profile_registry.known_accounts(registry)
     for username in usernames:
-        outfile = os.path.join(OUTPUT_DIR, f"{username}.html")
-        if os.path.exists(outfile):
-            print(f"[SKIP] {username} already downloaded.")
-            continue
+        path = saved_path(username)
+        if path and username not in known:
+            register_profile(registry, username, path, fetched_at=os.path.getmtime(path))
+
+
+class GlobalRateLimiter:
+    """Spaces page loads at least min_interval seconds apart across all worker threads."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
 
-        url = f"{BASE_URL}{username}"
-        print(f"[FETCHING] {url}")
-        driver.get(url)
-        time.sleep(5)  # wait for page to load
 
-        html = driver.page_source
-        with open(outfile, 'w', encoding='utf-8') as f:
-            f.write(html)
+def save_profile(driver, username, outfile, rate_limiter, registry=None):
+    """
+    Load one profile, write its page source or header snapshot and record it
+    in the registry with a status: 'ok', 'no_count' (the header shows no
+    follower count) or 'gone' (no such account); the registry refetches the
+    last two less often. A page where neither the header nor X's not-found
+    notice rendered (a timeout, a login wall) is neither saved nor recorded:
+    the last good snapshot stays, and so does the account's place in the due list.
+    """
+    url = f"{BASE_URL}{username}"
+    rate_limiter.wait()
+    print(f"[FETCHING] {url}")
+    safe_get(driver, url)
+    # wait only until the header and follower counts are rendered
+    wait_until_ready(driver, profile_ready, READY_TIMEOUT, LOAD_FALLBACK_SECONDS, what=username)
+
+    state = page_state(driver)
+    if state is None:
+        print(f"[WARN] {username}: profile did not load; keeping the last snapshot for a retry.")
+        return
+
+    html = page_html(driver)
+    fields = scrapexbios.extract_from_html(html, username)
+    status = 'gone' if state == 'gone' else 'ok' if fields.get('Followers') else 'no_count'
+
+    if status == 'gone' and saved_path(username):
+        # the last snapshot shows the account as it was; the registry records that it is gone
+        print(f"[GONE] {username}: account unavailable; keeping the last snapshot.")
+    else:
+        write_snapshot(outfile, html)
+        # a refresh in a different format replaces the older copy
+        for ext in SNAPSHOT_EXTENSIONS.values():
+            stale = os.path.join(OUTPUT_DIR, username + ext)
+            if stale != outfile and os.path.exists(stale):
+                os.remove(stale)
+        print(f"[SAVED] {outfile}" if status == 'ok' else f"[SAVED] {outfile} ({status})")
+    if registry is not None and record_profile(registry, username, fields, status=status):
+        print(f"[CHANGED] {username}")
+
+
+def profile_worker(worker_id, usernames, rate_limiter, cookie_file=None, registry=None):
+    """Drain the shared username queue with one browser."""
+    driver = setup_driver()
+    try:
+        if cookie_file and os.path.exists(cookie_file):
+            load_cookies(driver, cookie_file)
+        while True:
+            try:
+                username = usernames.get_nowait()
+            except queue.Empty:
+                break
+            if registry is None and saved_path(username):
+                print(f"[SKIP] {username} already downloaded.")
+                continue
+            try:
+                save_profile(driver, username, snapshot_path(username), rate_limiter, registry)
+            except Exception as e:
+                print(f"[ERROR] worker {worker_id}: {username}: {e}")
+    finally:
+        driver.quit()
+
+
+def fetch_profiles(num_workers=NUM_WORKERS, cookie_files=COOKIE_FILES,
+                   min_interval=MIN_SECONDS_BETWEEN_REQUESTS):
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        usernames = [line.strip() for line in f if line.strip()]
 
-        print(f"[SAVED] {outfile}")
-        time.sleep(2)
+    registry = profile_registry.open_registry(REGISTRY_DB) if REGISTRY_DB else None
+    todo = queue.Queue()
+    if registry is not None:
+        seed_registry(registry, usernames)
+        due = profile_registry.due_accounts(registry, usernames, limit=MAX_PROFILES_PER_RUN)
+        print(f"[INFO] {len(due)} of {len(usernames)} profiles are due for a fetch.")
+        for username in due:
+            todo.put(username)
+    else:
+        for username in usernames:
+            if saved_path(username):
+                print(f"[SKIP] {username} already downloaded.")
+                continue
+            todo.put(username)
+    if todo.empty():
+        if registry is not None:
+            registry.close()
+        return
 
-    driver.quit()
+    rate_limiter = GlobalRateLimiter(min_interval)
+    num_workers = max(1, min(num_workers, todo.qsize()))
+    print(f"[INFO] {todo.qsize()} profiles to fetch with {num_workers} browser(s).")
+    workers = []
+    for i in range(num_workers):
+        cookie_file = cookie_files[i % len(cookie_files)] if cookie_files else None
+        t = threading.Thread(target=profile_worker, args=(i, todo, rate_limiter, cookie_file, registry))
+        t.start()
+        workers.append(t)
+    for t in workers:
+        t.join()
+    if registry is not None:
+        registry.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from difflib import SequenceMatcher
+
+# Refresh registry shared by gethtml_xbios.py and Facebook/Facebook Bios/fb_gethtml.py
+# (which imports it from here); each fetcher keeps its own database file.
+
+# === CONFIGURATION ===
+DEFAULT_DB_PATH = 'profile_registry.sqlite3'
+TTL_DAYS = 7.0  # refetch a profile at least this often
+MIN_TTL_DAYS = 1.0  # ...but never more often than this
+GROWTH_WEIGHT = 200.0  # TTL is halved at 0.5% follower change per day
+GROWTH_WINDOW_DAYS = 30.0  # follower history used to measure that change
+# Longer TTLs for pages with nothing to track: a profile that shows no follower
+# count, and an account that no longer exists (suspended, renamed, deleted)
+STATUS_TTL_DAYS = {'no_count': 14.0, 'gone': 30.0}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    account TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,      -- unix time of the last successful fetch
+    changed_at REAL NOT NULL,      -- last fetch whose content_hash differed
+    content_hash TEXT NOT NULL,    -- of the extracted fields, not the raw page
+    bio TEXT,
+    followers INTEGER,
+    fields TEXT,                   -- JSON of the last extracted fields
+    status TEXT NOT NULL DEFAULT 'ok'  -- ok / no_count (no follower count shown) / gone
+);
+
+-- Follower counts over time. As in tweet_store's engagement table, a fetch
+-- whose count equals the previous row is not stored.
+CREATE TABLE IF NOT EXISTS follower_series (
+    account TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    followers INTEGER,
+    PRIMARY KEY (account, fetched_at)
+) WITHOUT ROWID;
+
+-- One row per bio change: a patch from the previous bio (the first row of an
+-- account patches the empty string), so every version can be rebuilt.
+CREATE TABLE IF NOT EXISTS bio_history (
+    account TEXT NOT NULL,
+    changed_at REAL NOT NULL,
+    patch TEXT NOT NULL,
+    PRIMARY KEY (account, changed_at)
+) WITHOUT ROWID;
+"""
+
+
+def open_registry(db_path=DEFAULT_DB_PATH):
+    """Open (and create if needed) the registry. Safe to share across threads behind a lock."""
+    parent = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(parent, exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    if 'status' not in {row['name'] for row in conn.execute("PRAGMA table_info(profiles)")}:
+        # registries created before the status column
+        conn.execute("ALTER TABLE profiles ADD COLUMN status TEXT NOT NULL DEFAULT 'ok'")
+        conn.commit()
+    return conn
+
+
+def parse_count(text):
+    """
+    Follower count as an int, or None.
+    Examples: '111.8K' -> 111800, '2,109' -> 2109, '1.5M' -> 1500000, '' -> None
+    """
+    text = str(text or '').strip().upper().replace(',', '')
+    multiplier = 1
+    for suffix, factor in (('K', 1_000), ('M', 1_000_000), ('B', 1_000_000_000)):
+        if text.endswith(suffix):
+            text, multiplier = text[:-1], factor
+            break
+    try:
+        return int(round(float(text) * multiplier))
+    except ValueError:
+        return None
+
+
+def make_patch(old, new):
+    """[[start, end, replacement], ...] turning old into new."""
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    return [[i1, i2, new[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+
+def apply_patch(text, patch):
+    out, pos = [], 0
+    for start, end, replacement in patch:
+        out.append(text[pos:start])
+        out.append(replacement)
+        pos = end
+    out.append(text[pos:])
+    return ''.join(out)
+
+
+def content_hash(fields):
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def known_accounts(conn):
+    return {row['account'] for row in conn.execute("SELECT account FROM profiles")}
+
+
+def record_fetch(conn, account, fields, bio_field, fetched_at=None, status=None):
+    """
+    Store the fields extracted from one fetch of account.
+
+    Only call this for a page that loaded (the fetchers check for a profile
+    header or a not-found notice first); a timeout or login wall should not be
+    recorded, so the last good version is kept and the account stays due.
+
+    The follower count goes into follower_series when it moved, and a changed
+    bio into bio_history as a patch. A 'gone' account keeps its last fields
+    and only gets the new status and fetch time.
+
+    Args:
+        conn: Connection from open_registry().
+        account (str): Username / page name as in the input list.
+        fields (dict): Row from the platform's extract_profile_data.
+        bio_field (str): Key of the bio text in fields ('Bio' on X, 'Intro' on Facebook).
+        fetched_at (float): Unix time of the fetch; defaults to now.
+        status (str): 'ok', 'no_count' or 'gone'. Defaults to 'ok' when fields
+            has a follower count, else 'no_count'.
+
+    Returns:
+        bool: True if the extracted fields (or the status) differ from the previous fetch.
+    """
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    bio = str(fields.get(bio_field) or '')
+    followers = parse_count(fields.get('Followers'))
+    if status is None:
+        status = 'ok' if followers is not None else 'no_count'
+    with conn:
+        previous = conn.execute("SELECT * FROM profiles WHERE account = ?", (account,)).fetchone()
+        if status == 'gone':
+            conn.execute(
+                "INSERT INTO profiles (account, fetched_at, changed_at, content_hash, status) "
+                "VALUES (?, ?, ?, '', 'gone') "
+                "ON CONFLICT(account) DO UPDATE SET fetched_at = excluded.fetched_at, status = 'gone', "
+                "changed_at = CASE WHEN profiles.status = 'gone' THEN profiles.changed_at "
+                "ELSE excluded.changed_at END",
+                (account, fetched_at, fetched_at))
+            return previous is None or previous['status'] != 'gone'
+        digest = content_hash(fields)
+        changed = previous is None or previous['content_hash'] != digest or previous['status'] != status
+        old_bio = (previous['bio'] or '') if previous is not None else None
+        if old_bio != bio:
+            patch = make_patch(old_bio or '', bio)
+            conn.execute("INSERT OR REPLACE INTO bio_history VALUES (?, ?, ?)",
+                         (account, fetched_at, json.dumps(patch, ensure_ascii=False)))
+        last = conn.execute("SELECT followers FROM follower_series WHERE account = ? "
+                            "ORDER BY fetched_at DESC LIMIT 1", (account,)).fetchone()
+        if followers is not None and (last is None or last['followers'] != followers):
+            conn.execute("INSERT OR REPLACE INTO follower_series VALUES (?, ?, ?)", (account, fetched_at, followers))
+        conn.execute(
+            "INSERT INTO profiles (account, fetched_at, changed_at, content_hash, bio, followers, fields, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(account) DO UPDATE SET fetched_at = excluded.fetched_at, "
+            "changed_at = CASE WHEN profiles.content_hash = excluded.content_hash "
+            "AND profiles.status = excluded.status THEN profiles.changed_at ELSE excluded.changed_at END, "
+            "content_hash = excluded.content_hash, bio = excluded.bio, "
+            "followers = excluded.followers, fields = excluded.fields, status = excluded.status",
+            (account, fetched_at, fetched_at, digest, bio, followers, json.dumps(fields, ensure_ascii=False), status))
+    return changed
+
+
+def follower_growth(conn, account, now=None, window_days=GROWTH_WINDOW_DAYS):
+    """Relative follower change per day over the window (0.0 without two points)."""
+    now = time.time() if now is None else now
+    rows = conn.execute(
+        "SELECT fetched_at, followers FROM follower_series WHERE account = ? AND fetched_at >= ? "
+        "ORDER BY fetched_at", (account, now - window_days * 86400)).fetchall()
+    if len(rows) < 2:
+        return 0.0
+    first, last = rows[0], rows[-1]
+    days = max((last['fetched_at'] - first['fetched_at']) / 86400, 1.0)
+    return abs(last['followers'] - first['followers']) / max(first['followers'], 1) / days
+
+
+def due_accounts(conn, accounts, now=None, ttl_days=TTL_DAYS, min_ttl_days=MIN_TTL_DAYS,
+                 growth_weight=GROWTH_WEIGHT, status_ttl_days=STATUS_TTL_DAYS, limit=None):
+    """
+    The accounts that should be fetched now, most urgent first.
+
+    Accounts never fetched come first. Any other account is due once its last
+    fetch is older than its TTL, which shrinks for fast-moving follower counts:
+
+        ttl = max(min_ttl_days, ttl_days / (1 + growth_weight * daily_growth))
+
+    Accounts whose last fetch had status 'no_count' or 'gone' use the fixed,
+    longer TTL in status_ttl_days instead. Due accounts are ordered by
+    age / ttl, so the most overdue go first when limit caps the run.
+    """
+    now = time.time() if now is None else now
+    fetched = {row['account']: (row['fetched_at'], row['status'])
+               for row in conn.execute("SELECT account, fetched_at, status FROM profiles")}
+    due = []
+    for account in dict.fromkeys(accounts):
+        if account not in fetched:
+            due.append((float('inf'), account))
+            continue
+        fetched_at, status = fetched[account]
+        if status in status_ttl_days:
+            ttl = status_ttl_days[status]
+        else:
+            ttl = max(min_ttl_days, ttl_days / (1 + growth_weight * follower_growth(conn, account, now)))
+        overdue = (now - fetched_at) / 86400 / ttl
+        if overdue >= 1:
+            due.append((overdue, account))
+    due.sort(key=lambda item: -item[0])
+    accounts = [account for _, account in due]
+    return accounts[:limit] if limit else accounts
+
+
+def bio_versions(conn, account):
+    """[(changed_at, bio text)] for every recorded version, oldest first."""
+    versions, text = [], ''
+    for row in conn.execute("SELECT changed_at, patch FROM bio_history WHERE account = ? ORDER BY changed_at",
+                            (account,)):
+        text = apply_patch(text, json.loads(row['patch']))
+        versions.append((row['changed_at'], text))
+    return versions
+
+
+def follower_series(conn, account):
+    """[(fetched_at, followers)], oldest first; counts hold until the next point."""
+    return [(row['fetched_at'], row['followers']) for row in conn.execute(
+        "SELECT fetched_at, followers FROM follower_series WHERE account = ? ORDER BY fetched_at", (account,))]
@@ -1,12 +1,29 @@
 import os
 import csv
-from lxml import html
+import gzip
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree, html
 
 # === CONFIGURATION ===
 HTML_DIR = 'profiles_html'
 OUTPUT_FILE = 'x_bios.csv'
+WORKERS = os.cpu_count() or 1  # parser processes; 1 parses in this process
+MIN_HIT_RATE = 0.9  # warn when a field is found in fewer pages than this
 
-# XPaths
+# Stable anchors: data-testid attributes and the profile's link targets. They
+# survive X adding or removing a wrapper div, which silently breaks the
+# absolute paths below (the blank "Date Joined" cells in x_bios.csv).
+ANCHOR_XPATHS = {
+    'Bio': '//*[@data-testid="UserDescription"]//text()',
+    'Date Joined': '//*[@data-testid="UserJoinDate"]//text()',
+    'Following': '(//a[substring(@href, string-length(@href) - 9) = "/following"])[1]/span[1]//text()',
+    # matches /followers and /verified_followers, not /followers_you_follow
+    'Followers': '(//a[substring(@href, string-length(@href) - 8) = "followers"])[1]/span[1]//text()',
+    'Posts': '(//*[@data-testid="primaryColumn"]//div[re:test(normalize-space(text()), "^[0-9][0-9.,]*[KMB]? posts?$")])[1]/text()',
+}
+VERIFIED_XPATH = 'boolean(//*[@data-testid="UserName"]//*[@aria-label="Verified account" or @data-testid="icon-verified"])'
+
+# Absolute XPaths, tried when an anchor finds nothing
 XPATHS = {
     'Bio': '//*[@id="react-root"]/div/div/div[2]/main/div/div/div/div/div/div[3]/div/div/div[1]/div/div[3]/div/div/span/text()',
     'Date Joined': '//*[@id="react-root"]/div/div/div[2]/main/div/div/div/div/div/div[3]/div/div/div[1]/div/div[4]/div/span[2]/span/text()',
@@ -15,50 +32,128 @@ XPATHS = {
     'Posts': '//*[@id="react-root"]/div/div/div[2]/main/div/div/div/div/div/div[1]/div[1]/div/div/div/div/div/div[2]/div/div/text()',
 }
 
+# Compiled once per process instead of re-parsing the expression for every file
+XPATH_NAMESPACES = {'re': 'http://exslt.org/regular-expressions'}
+COMPILED_ANCHORS = {key: etree.XPath(xp, namespaces=XPATH_NAMESPACES) for key, xp in ANCHOR_XPATHS.items()}
+COMPILED_XPATHS = {key: etree.XPath(xp) for key, xp in XPATHS.items()}
+COMPILED_VERIFIED = etree.XPath(VERIFIED_XPATH)
+
+# Full pages and gethtml_xbios snapshots (plain, gzip or zstd)
+HTML_EXTENSIONS = ('.html', '.html.gz', '.html.zst')
+
+
+def read_html(filepath):
+    """Return the HTML text of a saved page, decompressing .gz/.zst snapshots."""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    if filepath.endswith('.gz'):
+        data = gzip.decompress(data)
+    elif filepath.endswith('.zst'):
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data.decode('utf-8')
+
+
+def username_from_path(filepath):
+    name = os.path.basename(filepath)
+    for ext in HTML_EXTENSIONS:
+        if name.endswith(ext):
+            return name[:-len(ext)]
+    return os.path.splitext(name)[0]
 
-def extract_profile_data(filepath):
+
+def _text(nodes):
+    return ''.join(nodes).strip()
+
+
+def _legacy_text(nodes):
+    return ' '.join(v.strip() for v in nodes if v.strip())
+
+
+def extract_profile_data(filepath, sources=None):
+    """
+    Parse one saved profile. If sources is a dict, it is filled with where each
+    field came from: 'anchor', 'xpath' (absolute fallback) or '' (not found).
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        tree = html.fromstring(content)
-        data = {}
-        
-        # Extract username from filename
-        data['Username'] = os.path.splitext(os.path.basename(filepath))[0]
-
-        # Extract verification status
-        verified = False
-        if 'aria-label="Verified account"' in content or 'aria-label="Verified"' in content:
-            verified = True
-        data['Verified'] = verified
-
-        # Extract data via XPath
-        for key, xp in XPATHS.items():
-            try:
-                value = tree.xpath(xp)
-                if isinstance(value, list):
-                    value = ' '.join(v.strip() for v in value if v.strip())
-                data[key] = value.strip() if isinstance(value, str) else ''
-            except Exception:
-                data[key] = ''
-
-        return data
+        return extract_from_html(read_html(filepath), username_from_path(filepath), sources)
     except Exception as e:
         print(f"[ERROR] Failed to parse {filepath}: {e}")
         return None
 
 
+def extract_from_html(content, username, sources=None):
+    """The fields of extract_profile_data from page HTML already in memory (e.g. a fresh fetch)."""
+    tree = html.fromstring(content)
+    data = {}
+
+    # Username comes from the filename / the fetched account
+    data['Username'] = username
+
+    # Extract verification status: the badge next to the profile name; pages
+    # without the UserName anchor fall back to any verified badge on the page
+    if tree.xpath('//*[@data-testid="UserName"]'):
+        verified = COMPILED_VERIFIED(tree)
+    else:
+        verified = 'aria-label="Verified account"' in content or 'aria-label="Verified"' in content
+    data['Verified'] = verified
+
+    # Extract data via the anchors, then the absolute XPaths
+    for key in ANCHOR_XPATHS:
+        source = ''
+        try:
+            value = _text(COMPILED_ANCHORS[key](tree))
+            if value:
+                source = 'anchor'
+            else:
+                value = _legacy_text(COMPILED_XPATHS[key](tree))
+                source = 'xpath' if value else ''
+        except Exception:
+            value = ''
+        data[key] = value
+        if sources is not None:
+            sources[key] = source
+
+    return data
+
+
+def _parse_with_sources(filepath):
+    sources = {}
+    return extract_profile_data(filepath, sources), sources
+
+
+def parse_files(paths, workers=WORKERS):
+    """Parse paths (in a process pool when workers > 1). Returns [(data, sources)] in input order."""
+    if workers <= 1 or len(paths) < 2:
+        return [_parse_with_sources(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_parse_with_sources, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+
+def report_hit_rates(results, min_rate=MIN_HIT_RATE):
+    """Print how often each field was found, and by which selector, so selector drift shows up at once."""
+    parsed = [sources for data, sources in results if data]
+    if not parsed:
+        return
+    print(f"[HITS] Field hit rates over {len(parsed)} pages:")
+    for key in ANCHOR_XPATHS:
+        anchor = sum(1 for s in parsed if s.get(key) == 'anchor')
+        fallback = sum(1 for s in parsed if s.get(key) == 'xpath')
+        rate = (anchor + fallback) / len(parsed)
+        print(f"  {key:<12} {rate:6.1%}  (anchor {anchor}, absolute xpath {fallback})")
+        if rate < min_rate:
+            print(f"[WARN] '{key}' found in only {rate:.0%} of pages; its selectors may have drifted.")
+        elif fallback:
+            print(f"[WARN] '{key}' needed the absolute xpath on {fallback} pages; check the anchor.")
+
+
 def main():
-    files = [f for f in os.listdir(HTML_DIR) if f.endswith('.html')]
+    files = [f for f in os.listdir(HTML_DIR) if f.endswith(HTML_EXTENSIONS)]
     print(f"[INFO] Found {len(files)} HTML files to process.")
 
-    all_data = []
-    for file in files:
-        path = os.path.join(HTML_DIR, file)
-        data = extract_profile_data(path)
-        if data:
-            all_data.append(data)
+    results = parse_files([os.path.join(HTML_DIR, file) for file in files])
+    all_data = [data for data, _ in results if data]
+    report_hit_rates(results)
 
     # Write to CSV
     if all_data:
@@ -72,4 +167,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,79 @@
+import random
+import threading
+
+from classifier_backends import is_error_result
+
+
+class ConfidenceCascade:
+    """
+    Two-tier labelling: a cheap backend labels every tweet and only the
+    doubtful ones are sent on to the expensive one (the analyzer's main
+    backend, Gemini by default).
+
+    route() gives each cheap result one of:
+        'settled'         keep the cheap label
+        'error'           the cheap tier failed on it
+        'low-confidence'  confidence below min_confidence
+        'label'           label is in escalate_labels ("somewhat likely" by default)
+        'audit'           confident, but escalated anyway (audit_rate share) so
+                          the cheap tier's accuracy on settled tweets can be measured
+
+    Results without a "confidence" key (e.g. a hosted model) only escalate on
+    errors, labels and audits.
+    """
+
+    def __init__(self, cheap, min_confidence=0.85, escalate_labels=("somewhat likely",), audit_rate=0.02, seed=None):
+        self.cheap = cheap
+        self.min_confidence = min_confidence
+        self.escalate_labels = set(escalate_labels)
+        self.audit_rate = audit_rate
+        self._rng = random.Random(seed)
+        self.counts = {'settled': 0, 'error': 0, 'low-confidence': 0, 'label': 0, 'audit': 0}
+        self.agree = {'low-confidence': 0, 'label': 0, 'audit': 0}
+        self.compared = {'low-confidence': 0, 'label': 0, 'audit': 0}  # escalations whose expensive call succeeded
+        self.changes = {}
+        self._lock = threading.Lock()
+
+    def route(self, result):
+        if is_error_result(result):
+            reason = 'error'
+        elif result.get('confidence', 1.0) < self.min_confidence:
+            reason = 'low-confidence'
+        elif result.get('classification') in self.escalate_labels:
+            reason = 'label'
+        else:
+            reason = 'settled'
+        with self._lock:
+            if reason == 'settled' and self.audit_rate and self._rng.random() < self.audit_rate:
+                reason = 'audit'
+            self.counts[reason] += 1
+        return reason
+
+    def record(self, reason, cheap_result, final_result):
+        """Compare the two tiers' labels for an escalated tweet."""
+        if reason not in self.agree or is_error_result(final_result):
+            return
+        cheap_label = cheap_result.get('classification')
+        final_label = final_result.get('classification')
+        with self._lock:
+            self.compared[reason] += 1
+            if cheap_label == final_label:
+                self.agree[reason] += 1
+            else:
+                change = f"{cheap_label} -> {final_label}"
+                self.changes[change] = self.changes.get(change, 0) + 1
+
+    def summary(self):
+        """Per-tier counts and, per escalation reason, how often the expensive tier agreed."""
+        total = sum(self.counts.values())
+        escalated = total - self.counts['settled']
+        agreement = {reason: round(self.agree[reason] / self.compared[reason], 3) if self.compared[reason] else None
+                     for reason in self.agree}
+        return {
+            'cheap_tier': self.counts['settled'],
+            'expensive_tier': escalated,
+            'settled_share': round(self.counts['settled'] / total, 3) if total else 0.0,
+            'reasons': dict(self.counts),
+            'agreement': agreement,
+            'label_changes': dict(sorted(self.changes.items(), key=lambda kv: -kv[1])),
+        }
@@ -0,0 +1,220 @@
+import os
+import csv
+import json
+import math
+import time
+import sqlite3
+
+
+def _jsonable(value):
+    """Plain-Python value for json: numpy scalars unwrapped, NaN -> None."""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _merge_kind(kind, value):
+    """Column type seen so far ('bool' / 'int' / 'float' / 'str', None if only nulls) widened by value."""
+    if value is None:
+        return kind
+    new = ('bool' if isinstance(value, bool) else 'int' if isinstance(value, int)
+           else 'float' if isinstance(value, float) else 'str')
+    if kind is None or kind == new:
+        return new
+    if {kind, new} == {'int', 'float'}:
+        return 'float'
+    return 'str'
+
+
+def is_failed_record(row):
+    """A row whose analysis failed: marked 'failed', or (older runs) carrying an 'Error: ...' translation."""
+    return row.get('analysis_status') == 'failed' or str(row.get('english_translation') or '').startswith('Error:')
+
+
+class _BufferedCheckpoint:
+    """
+    Append-only record of finished rows, keyed by a record id (the tweet_url).
+
+    add() only buffers; the buffer is written out every flush_every rows or
+    flush_seconds seconds, whichever comes first, and on close(). Resuming
+    reads back just the ids, so it costs O(processed) with no pandas parse.
+    """
+
+    def __init__(self, path, flush_every=100, flush_seconds=5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.existed = os.path.exists(path)
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def add(self, record_id, row):
+        record = {k: _jsonable(v) for k, v in row.items()}
+        self._buffer.append((str(record_id), record))
+        if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+    def import_csv(self, csv_path, id_column=None):
+        """
+        Seed a fresh checkpoint from an output CSV written by an older run, so
+        switching to checkpoints does not reprocess anything. Rows without
+        id_column get positional ids ('row-1', 'row-2', ...).
+        """
+        count = 0
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            for count, row in enumerate(csv.DictReader(f), 1):
+                record_id = row.get(id_column) if id_column else None
+                self._buffer.append((str(record_id or f"row-{count}"), row))
+        self.flush()
+        return count
+
+    def failed_ids(self):
+        """Ids whose latest record is a failed analysis, for retrying in bulk."""
+        self.flush()
+        return {record_id for record_id, row in self.iter_items() if is_failed_record(row)}
+
+    def export(self, output_file, chunk_rows=10000):
+        """
+        Write every record to output_file: CSV, or Parquet if the name ends in
+        .parquet. Streams the checkpoint twice (once for the columns, once for
+        the rows), so memory does not grow with the number of records.
+        """
+        self.flush()
+        fieldnames = []
+        kinds = {}
+        for _, record in self.iter_items():
+            for key, value in record.items():
+                if key not in kinds:
+                    fieldnames.append(key)
+                    kinds[key] = None
+                kinds[key] = _merge_kind(kinds[key], value)
+
+        tmp_path = output_file + '.tmp'
+        if output_file.endswith('.parquet'):
+            count = self._export_parquet(tmp_path, fieldnames, kinds, chunk_rows)
+        else:
+            count = 0
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                for _, record in self.iter_items():
+                    writer.writerow(record)
+                    count += 1
+        os.replace(tmp_path, output_file)
+        return count
+
+    def _export_parquet(self, path, fieldnames, kinds, chunk_rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        types = {'bool': pa.bool_(), 'int': pa.int64(), 'float': pa.float64()}
+        schema = pa.schema([(name, types.get(kinds[name], pa.string())) for name in fieldnames])
+        strings = [name for name in fieldnames if kinds[name] not in types]
+        count = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            chunk = []
+            for _, record in self.iter_items():
+                for name in strings:
+                    value = record.get(name)
+                    if value is not None and not isinstance(value, str):
+                        record[name] = str(value)
+                chunk.append(record)
+                if len(chunk) >= chunk_rows:
+                    writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                    count += len(chunk)
+                    chunk = []
+            if chunk or not count:
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                count += len(chunk)
+        return count
+
+
+class JsonlCheckpoint(_BufferedCheckpoint):
+    """One JSON object per line: {"id": ..., "row": {...}}."""
+
+    def _write(self, items):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record_id, record in items:
+                f.write(json.dumps({"id": record_id, "row": record}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _lines(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # a torn last line from a crash mid-write; everything before it is intact
+                    continue
+
+    def processed_ids(self):
+        return {item["id"] for item in self._lines()}
+
+    def iter_items(self):
+        # later lines win if an id was ever written twice (e.g. a retried failure): a
+        # first pass keeps only each id's last line number, a second yields that line
+        last = {}
+        for number, item in enumerate(self._lines()):
+            last[item["id"]] = number
+        for number, item in enumerate(self._lines()):
+            if last[item["id"]] == number:
+                yield item["id"], item["row"]
+
+
+class SqliteCheckpoint(_BufferedCheckpoint):
+    """Same contract as JsonlCheckpoint, in a single SQLite table."""
+
+    def __init__(self, path, flush_every=100, flush_seconds=5.0):
+        super().__init__(path, flush_every, flush_seconds)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (seq INTEGER PRIMARY KEY, id TEXT UNIQUE, row TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _write(self, items):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO results (id, row) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET row = excluded.row",
+                [(record_id, json.dumps(record, ensure_ascii=False)) for record_id, record in items],
+            )
+
+    def processed_ids(self):
+        return {row[0] for row in self._conn.execute("SELECT id FROM results")}
+
+    def iter_items(self):
+        for record_id, row in self._conn.execute("SELECT id, row FROM results ORDER BY seq"):
+            yield record_id, json.loads(row)
+
+    def close(self):
+        super().close()
+        self._conn.close()
+
+
+def default_checkpoint_path(output_file):
+    return os.path.splitext(output_file)[0] + '.checkpoint.jsonl'
+
+
+def open_checkpoint(path, flush_every=100, flush_seconds=5.0):
+    """JSONL checkpoint unless the path ends in .sqlite3 / .db."""
+    if path.endswith(('.sqlite3', '.sqlite', '.db')):
+        return SqliteCheckpoint(path, flush_every, flush_seconds)
+    return JsonlCheckpoint(path, flush_every, flush_seconds)
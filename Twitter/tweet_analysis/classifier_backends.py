@@ -0,0 +1,283 @@
+import re
+import glob
+import json
+import time
+import zlib
+
+import numpy as np
+import requests
+
+from analysis_engine import make_session, parse_retry_after
+from prefilter import fold
+
+# Every backend takes a list of (tweet_text, lang) pairs and returns one
+# {"classification": ..., "english_translation": ...} dict per pair, in order.
+# Failed items come from error_result(): no label, status 'failed' and the
+# reason under 'error', so is_error_result() and the cache treat them alike.
+
+
+def error_result(message):
+    """Placeholder for a tweet whose call failed. It has no label, so it can never count as a negative."""
+    if not message.startswith("Error:"):
+        message = f"Error: {message}"
+    return {"classification": None, "english_translation": "", "status": "failed", "error": message}
+
+
+def is_error_result(result):
+    """True for error_result() placeholders (and the 'Error: ...' translations of older caches and checkpoints)."""
+    return result.get("status") == "failed" or str(result.get("english_translation", "")).startswith("Error:")
+
+
+def _is_english(lang):
+    return isinstance(lang, str) and lang.lower().split('-')[0] == 'en'
+
+
+class ClassifierBackend:
+    """
+    Interface shared by the classifiers process_tweets_from_csv can use.
+
+    name goes into the response-cache key, so two backends never share
+    answers. cacheable is False for backends that are cheaper to rerun than
+    to look up.
+    """
+
+    name = "backend"
+    cacheable = True
+
+    def classify(self, tweets):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class OpenAICompatibleBackend(ClassifierBackend):
+    """
+    Any server speaking the OpenAI chat-completions API (vLLM, llama.cpp
+    server, Ollama, LM Studio, hosted gateways). One request per tweet; the
+    analyzer's worker pool provides the concurrency.
+    """
+
+    def __init__(self, base_url, model, system_prompt, labels, api_key=None, session=None,
+                 rate_limiter=None, timeout=60, max_retries=5, metrics=None):
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.model = model
+        self.name = f"openai:{model}"
+        self.system_prompt = system_prompt
+        self.labels = list(labels)
+        self.session = session if session is not None else make_session()
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.metrics = metrics
+
+    def _prompt(self, text, lang):
+        wanted = '"classification"' if _is_english(lang) else '"classification" and "english_translation"'
+        return (f"Classify the following tweet as one of {json.dumps(self.labels)}. "
+                f"Answer with a JSON object with the keys {wanted}.\n"
+                f"Tweet text: \"{text}\"")
+
+    def _post(self, body, call_info):
+        started = time.perf_counter()
+
+        def finish(outcome, status, attempts):
+            call_info.update(outcome=outcome, status=status, attempts=attempts,
+                             latency=time.perf_counter() - started)
+
+        for attempt in range(self.max_retries):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.post(self.url, data=json.dumps(body), timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                print(f"Error making API request: {e}")
+                finish('network_error', None, attempt + 1)
+                return None
+            if response.status_code == 429:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if self.rate_limiter is not None:
+                    delay = self.rate_limiter.on_throttle(retry_after)
+                else:
+                    delay = retry_after if retry_after is not None else 2 * (2 ** attempt)
+                    time.sleep(delay)
+                print(f"Rate limit hit. Retrying in ~{delay:.1f} seconds... (Attempt {attempt + 1}/{self.max_retries})")
+                continue
+            if response.status_code >= 400:
+                print(f"Error making API request: HTTP {response.status_code}")
+                finish('http_error', response.status_code, attempt + 1)
+                return None
+            if self.rate_limiter is not None:
+                self.rate_limiter.on_success()
+            finish('ok', response.status_code, attempt + 1)
+            return response
+        finish('rate_limited', 429, self.max_retries)
+        return None
+
+    def classify_one(self, text, lang):
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": self._prompt(text, lang)},
+            ],
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+        }
+        call_info = {}
+        response = self._post(body, call_info)
+        try:
+            if response is None:
+                return error_result("API request failed.")
+            try:
+                data = response.json()
+                content = data['choices'][0]['message']['content']
+                result = json.loads(content)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                print(f"Error parsing API response: {e}")
+                call_info['outcome'] = 'parse_error'
+                return error_result("Response parsing failed.")
+            if not isinstance(result, dict) or result.get("classification") not in self.labels:
+                call_info['outcome'] = 'parse_error'
+                return error_result("Response parsing failed.")
+        finally:
+            if self.metrics is not None:
+                self.metrics.record(self.name, items=1, **call_info)
+        translation = result.get("english_translation") or ("" if not _is_english(lang) else text)
+        usage = data.get('usage') or {}
+        return {"classification": result["classification"], "english_translation": translation,
+                "prompt_tokens": usage.get('prompt_tokens', 0), "output_tokens": usage.get('completion_tokens', 0)}
+
+    def classify(self, tweets):
+        return [self.classify_one(text, lang) for text, lang in tweets]
+
+    def close(self):
+        self.session.close()
+
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def hashed_features(text, dims):
+    """
+    Feature indices for one tweet: words, word bigrams and character 4-grams
+    of each word (so inflected and agglutinated forms in fr/pt/sw/ar still
+    share features), hashed into `dims` buckets.
+    """
+    words = _WORD_RE.findall(fold(re.sub(r'https?://\S+', ' ', str(text))))
+    grams = ['w:' + w for w in words]
+    grams += ['b:' + a + ' ' + b for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += ['c:' + padded[i:i + 4] for i in range(max(1, len(padded) - 3))]
+    return np.array([zlib.crc32(g.encode('utf-8')) % dims for g in grams], dtype=np.int64)
+
+
+class LocalLinearBackend(ClassifierBackend):
+    """
+    In-process multinomial naive Bayes over hashed n-gram features, trained
+    on the labels earlier runs wrote to the analyzed_*.csv files. It labels
+    tens of thousands of tweets per second on one CPU core and returns no
+    translation (English tweets keep their text).
+
+    Each result also has a "confidence": the top class probability after
+    length-normalizing the log-likelihoods, which keeps long tweets from
+    always scoring ~1.0. It is a ranking signal, not a calibrated probability.
+    """
+
+    name = "local-nb"
+    cacheable = False
+
+    def __init__(self, labels, log_prior, log_likelihood, dims, sharpness=8.0):
+        self.labels = list(labels)
+        self.log_prior = np.asarray(log_prior, dtype=np.float64)
+        self.log_likelihood = np.asarray(log_likelihood, dtype=np.float64)
+        self.dims = dims
+        self.sharpness = sharpness
+
+    @classmethod
+    def train(cls, texts, labels, label_names, dims=2 ** 18, alpha=0.5):
+        counts = np.zeros((len(label_names), dims))
+        docs = np.zeros(len(label_names))
+        index = {label: i for i, label in enumerate(label_names)}
+        for text, label in zip(texts, labels):
+            if label not in index:
+                continue
+            row = index[label]
+            docs[row] += 1
+            np.add.at(counts[row], hashed_features(text, dims), 1)
+        log_prior = np.log((docs + 1) / (docs.sum() + len(label_names)))
+        smoothed = counts + alpha
+        log_likelihood = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+        return cls(label_names, log_prior, log_likelihood, dims)
+
+    @classmethod
+    def train_from_csv(cls, paths, label_names, dims=2 ** 18):
+        """
+        Train on analyzed output files. Rows whose label came from the keyword
+        prefilter, from the cascade's cheap tier (this model's own guesses) or
+        from a failed call are left out: they are not labels of the expensive model.
+        """
+        import pandas as pd
+        texts, labels = [], []
+        for path in paths:
+            df = pd.read_csv(path)
+            if 'prefilter' in df.columns:
+                df = df[df['prefilter'] != 'skipped']
+            if 'tier' in df.columns:
+                df = df[df['tier'] != 'cheap']
+            if 'analysis_status' in df.columns:
+                df = df[df['analysis_status'] != 'failed']
+            errors = df['english_translation'].astype(str).str.startswith('Error:')
+            df = df[~errors & df['climate_relevance_label'].isin(label_names)]
+            texts.extend(df['tweet_text'].astype(str))
+            labels.extend(df['climate_relevance_label'])
+        print(f"Training local classifier on {len(texts)} labeled tweets from {len(paths)} files.")
+        return cls.train(texts, labels, label_names, dims)
+
+    def save(self, path):
+        np.savez_compressed(path, labels=np.array(self.labels), log_prior=self.log_prior,
+                            log_likelihood=self.log_likelihood, dims=self.dims)
+
+    @classmethod
+    def load(cls, path, sharpness=8.0):
+        data = np.load(path)
+        return cls([str(label) for label in data['labels']], data['log_prior'], data['log_likelihood'],
+                   int(data['dims']), sharpness=sharpness)
+
+    def predict_proba(self, text):
+        features = hashed_features(text, self.dims)
+        if len(features):
+            scores = self.log_likelihood[:, features].mean(axis=1) * self.sharpness
+        else:
+            scores = np.zeros(len(self.labels))
+        scores = scores + self.log_prior
+        scores = np.exp(scores - scores.max())
+        return scores / scores.sum()
+
+    def classify(self, tweets):
+        results = []
+        for text, lang in tweets:
+            proba = self.predict_proba(text)
+            best = int(proba.argmax())
+            results.append({
+                "classification": self.labels[best],
+                "english_translation": str(text) if _is_english(lang) else "",
+                "confidence": round(float(proba[best]), 4),
+            })
+        return results
+
+
+if __name__ == "__main__":
+    # Train the offline model from the outputs of earlier Gemini runs.
+    TRAINING_CSVS = sorted(glob.glob("analyzed_*.csv"))
+    MODEL_PATH = "local_classifier.npz"
+    LABELS = ["definitely yes", "somewhat likely", "unlikely"]
+
+    if not TRAINING_CSVS:
+        print("Error: no analyzed_*.csv files found to train on.")
+    else:
+        model = LocalLinearBackend.train_from_csv(TRAINING_CSVS, LABELS)
+        model.save(MODEL_PATH)
+        print(f"Saved local classifier to '{MODEL_PATH}'.")
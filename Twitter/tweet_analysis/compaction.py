@@ -0,0 +1,78 @@
+import re
+import threading
+
+_URL_RE = re.compile(r'(?:https?://|pic\.twitter\.com/|\bt\.co/)\S+')
+_MENTION_RUN_RE = re.compile(r'@\w+(?:\s+@\w+)+')
+_HASHTAG_RE = re.compile(r'#\w+')
+_SPACE_RE = re.compile(r'\s+')
+
+
+class TextCompactor:
+    """
+    Shrinks tweet text before it goes into a prompt.
+
+    - links (t.co, pic.twitter.com, any http/https URL) are removed
+    - a run of several @mentions keeps only the first one
+    - a hashtag already seen earlier in the tweet is dropped, and at most
+      max_hashtags distinct hashtags are kept
+    - the result is cut at a word boundary to about max_tokens tokens
+      (~4 characters each), marked with an ellipsis
+
+    Dropped mentions, hashtags and tail text can carry the climate signal, so
+    run tweet_analyzer.check_compaction on a sample (raw vs compacted labels)
+    before using a compactor on a file. The counters let a run report how
+    much text was saved.
+    """
+
+    def __init__(self, strip_urls=True, collapse_mentions=True, max_hashtags=3, max_tokens=120):
+        self.strip_urls = strip_urls
+        self.collapse_mentions = collapse_mentions
+        self.max_hashtags = max_hashtags
+        self.max_tokens = max_tokens
+        self.tweets = 0
+        self.chars_in = 0
+        self.chars_out = 0
+        self._lock = threading.Lock()
+
+    def _hashtags(self, text):
+        seen = set()
+
+        def keep(match):
+            tag = match.group(0).casefold()
+            if tag in seen or (self.max_hashtags is not None and len(seen) >= self.max_hashtags):
+                return ''
+            seen.add(tag)
+            return match.group(0)
+
+        return _HASHTAG_RE.sub(keep, text)
+
+    def compact(self, text):
+        original = str(text)
+        text = original
+        if self.strip_urls:
+            text = _URL_RE.sub(' ', text)
+        if self.collapse_mentions:
+            text = _MENTION_RUN_RE.sub(lambda m: m.group(0).split()[0], text)
+        text = self._hashtags(text)
+        text = _SPACE_RE.sub(' ', text).strip()
+        if self.max_tokens and len(text) > self.max_tokens * 4:
+            cut = text[:self.max_tokens * 4]
+            text = (cut.rsplit(' ', 1)[0] or cut) + '…'
+        if not text:
+            # nothing but links/tags: send the original rather than an empty prompt
+            text = original
+        with self._lock:
+            self.tweets += 1
+            self.chars_in += len(original)
+            self.chars_out += len(text)
+        return text
+
+    def summary(self):
+        saved = self.chars_in - self.chars_out
+        return {
+            'tweets': self.tweets,
+            'chars_in': self.chars_in,
+            'chars_out': self.chars_out,
+            'reduction': round(saved / self.chars_in, 3) if self.chars_in else 0.0,
+            'est_tokens_saved': saved // 4,
+        }
@@ -0,0 +1,156 @@
+import re
+import zlib
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+_URL_RE = re.compile(r'https?://\S+|\bt\.co/\S+')
+_TAG_RE = re.compile(r'[#@]\w+')
+_TOKEN_RE = re.compile(r'\w+')
+
+# Prime just above 2**32: with 32-bit shingle hashes and a, b < 2**31 the
+# universal hash a*x + b stays inside uint64.
+_PRIME = np.uint64(4294967311)
+
+
+def normalize_for_dedup(text):
+    """Lowercase, strip accents, links, hashtags and @mentions: what reposted announcements differ by."""
+    text = unicodedata.normalize('NFKD', str(text).casefold())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = _URL_RE.sub(' ', text)
+    text = _TAG_RE.sub(' ', text)
+    return _TOKEN_RE.findall(text)
+
+
+def shingles(tokens, size=3):
+    """Word n-grams; texts shorter than one n-gram are a single shingle."""
+    if len(tokens) < size:
+        return {' '.join(tokens)}
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """
+    Streaming MinHash/LSH clustering of tweet texts.
+
+    assign() is called once per tweet in input order. The first tweet of each
+    cluster becomes its representative; a later tweet joins the cluster when
+    it shares an LSH band with the representative and their estimated Jaccard
+    similarity (fraction of equal MinHash values) is at least `threshold`.
+    With 16 bands of 4 rows the LSH stage catches pairs above roughly 0.5
+    similarity; the threshold check then keeps only true near-copies.
+
+    Memory is bounded by max_clusters (~2.5 KB each): past it, the oldest
+    clusters are forgotten, and a later near-copy of one starts a new
+    cluster (it is classified instead of reusing a label). None keeps all.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.8, shingle_size=3, seed=1, max_clusters=50000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.max_clusters = max_clusters
+        self._buckets = {}
+        self._signatures = OrderedDict()
+        self.members = 0
+        self.evicted = 0
+
+    def signature(self, text):
+        grams = shingles(normalize_for_dedup(text), self.shingle_size)
+        hashes = np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+        return ((np.outer(hashes, self.a) + self.b) % _PRIME).min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, sig):
+        return [(i, sig[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(self.bands)]
+
+    def assign(self, text, key):
+        """
+        Place one tweet. key is a stable identifier for it (the tweet_url);
+        the cluster id is derived from the representative's key, so the same
+        input in the same order always gets the same ids. Ids are not stable
+        across resumed runs: tweets already in the checkpoint never reach
+        assign(), so a representative classified earlier is not in the index
+        and its remaining near-duplicates form a new cluster.
+
+        Returns:
+            tuple: (cluster_id, is_representative)
+        """
+        sig = self.signature(text)
+        band_keys = self._band_keys(sig)
+        seen = set()
+        for band_key in band_keys:
+            cluster_id = self._buckets.get(band_key)
+            if cluster_id is None or cluster_id in seen:
+                continue
+            seen.add(cluster_id)
+            if np.mean(self._signatures[cluster_id] == sig) >= self.threshold:
+                self.members += 1
+                return cluster_id, False
+
+        cluster_id = hashlib.blake2b(str(key).encode('utf-8'), digest_size=6).hexdigest()
+        self._signatures[cluster_id] = sig
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, cluster_id)
+        if self.max_clusters and len(self._signatures) > self.max_clusters:
+            self._evict_oldest()
+        return cluster_id, True
+
+    def _evict_oldest(self):
+        old_id, old_sig = self._signatures.popitem(last=False)
+        for band_key in self._band_keys(old_sig):
+            if self._buckets.get(band_key) == old_id:
+                del self._buckets[band_key]
+        self.evicted += 1
+
+    @property
+    def clusters(self):
+        """Clusters created so far, including evicted ones."""
+        return len(self._signatures) + self.evicted
+
+
+class ClusterResults:
+    """
+    Hands a representative's classification to the cluster members that are
+    being processed on other worker threads.
+
+    With max_clusters, only that many published results are kept (oldest
+    dropped first); give it headroom over the index's max_clusters so a
+    cluster the index still knows keeps its result. A member whose result
+    was dropped waits out its timeout and is classified itself.
+    """
+
+    def __init__(self, max_clusters=None):
+        self.max_clusters = max_clusters
+        self._events = {}
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _event(self, cluster_id):
+        with self._lock:
+            return self._events.setdefault(cluster_id, threading.Event())
+
+    def publish(self, cluster_id, result):
+        event = self._event(cluster_id)
+        with self._lock:
+            self._results[cluster_id] = result
+            while self.max_clusters and len(self._results) > self.max_clusters:
+                old_id, _ = self._results.popitem(last=False)
+                self._events.pop(old_id, None)
+        event.set()
+
+    def wait(self, cluster_id, timeout=None):
+        """The representative's result, or None if it did not arrive in time."""
+        if not self._event(cluster_id).wait(timeout):
+            with self._lock:
+                self._events.pop(cluster_id, None)
+            return None
+        return self._results.get(cluster_id)
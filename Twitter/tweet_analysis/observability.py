@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
+
+
+class CallMetrics:
+    """
+    Per-call records and rolling metrics for the classifier backends.
+
+    record() is called once per API call (after its retries) with at least
+    backend, outcome ('ok', 'http_error', 'network_error', 'rate_limited',
+    'parse_error'), latency, status and attempts. Each record is appended as
+    one JSON line to log_path. Counters, a latency histogram and rolling
+    window gauges (throughput, error ratio, p95 latency) are written in the
+    Prometheus text format to textfile_path, for node_exporter's textfile
+    collector or any scraper that reads the file.
+    """
+
+    def __init__(self, log_path=None, textfile_path=None, window_seconds=60.0, write_every=10.0):
+        self.log_path = log_path
+        self.textfile_path = textfile_path
+        self.window_seconds = window_seconds
+        self.write_every = write_every
+        self.calls = {}
+        self.items = {}
+        self.retries = {}
+        self.buckets = {}
+        self.latency_sum = {}
+        self._window = deque()
+        self._log = open(log_path, 'a', encoding='utf-8') if log_path else None
+        self._last_write = time.monotonic()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # one textfile write at a time; they share the tmp file
+
+    def record(self, backend, outcome, latency, status=None, attempts=1, items=1, **extra):
+        now = time.time()
+        entry = {'ts': round(now, 3), 'backend': backend, 'outcome': outcome, 'latency': round(latency, 4),
+                 'status': status, 'attempts': attempts, 'items': items, **extra}
+        with self._lock:
+            key = (backend, outcome)
+            self.calls[key] = self.calls.get(key, 0) + 1
+            self.items[key] = self.items.get(key, 0) + items
+            self.retries[backend] = self.retries.get(backend, 0) + max(0, attempts - 1)
+            counts = self.buckets.setdefault(backend, [0] * (len(LATENCY_BUCKETS) + 1))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self.latency_sum[backend] = self.latency_sum.get(backend, 0.0) + latency
+            self._window.append((now, latency, outcome == 'ok', items))
+            if self._log is not None:
+                self._log.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            due = self.textfile_path and time.monotonic() - self._last_write >= self.write_every
+            if due:
+                # claimed here, so the calls racing this one don't all start a write
+                self._last_write = time.monotonic()
+        if due:
+            self.write_textfile()
+
+    def rolling(self):
+        """Throughput, error ratio and p95 latency over the last window_seconds."""
+        with self._lock:
+            cutoff = time.time() - self.window_seconds
+            while self._window and self._window[0][0] < cutoff:
+                self._window.popleft()
+            window = list(self._window)
+        if not window:
+            return {'calls': 0, 'tweets_per_second': 0.0, 'error_ratio': 0.0, 'p95_latency': 0.0}
+        span = max(1.0, min(self.window_seconds, time.time() - window[0][0]))
+        latencies = sorted(w[1] for w in window)
+        return {
+            'calls': len(window),
+            'tweets_per_second': round(sum(w[3] for w in window if w[2]) / span, 3),
+            'error_ratio': round(sum(1 for w in window if not w[2]) / len(window), 4),
+            'p95_latency': round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 4),
+        }
+
+    def render(self):
+        roll = self.rolling()
+        lines = []
+        with self._lock:
+            lines += ['# HELP tweet_analyzer_calls_total Classifier API calls by outcome.',
+                      '# TYPE tweet_analyzer_calls_total counter']
+            lines += [f'tweet_analyzer_calls_total{_labels(backend=b, outcome=o)} {n}'
+                      for (b, o), n in sorted(self.calls.items())]
+            lines += ['# HELP tweet_analyzer_tweets_total Tweets sent, by call outcome.',
+                      '# TYPE tweet_analyzer_tweets_total counter']
+            lines += [f'tweet_analyzer_tweets_total{_labels(backend=b, outcome=o)} {n}'
+                      for (b, o), n in sorted(self.items.items())]
+            lines += ['# HELP tweet_analyzer_retries_total Extra attempts after 429s.',
+                      '# TYPE tweet_analyzer_retries_total counter']
+            lines += [f'tweet_analyzer_retries_total{_labels(backend=b)} {n}' for b, n in sorted(self.retries.items())]
+            lines += ['# HELP tweet_analyzer_call_latency_seconds Call latency including retries.',
+                      '# TYPE tweet_analyzer_call_latency_seconds histogram']
+            for backend, counts in sorted(self.buckets.items()):
+                for bound, n in zip(LATENCY_BUCKETS, counts):
+                    lines.append(f'tweet_analyzer_call_latency_seconds_bucket{_labels(backend=backend, le=bound)} {n}')
+                lines.append(f'tweet_analyzer_call_latency_seconds_bucket{_labels(backend=backend, le="+Inf")} {counts[-1]}')
+                lines.append(f'tweet_analyzer_call_latency_seconds_sum{_labels(backend=backend)} '
+                             f'{self.latency_sum[backend]:.4f}')
+                lines.append(f'tweet_analyzer_call_latency_seconds_count{_labels(backend=backend)} {counts[-1]}')
+        for name, key, help_text in (
+                ('throughput_tweets_per_second', 'tweets_per_second', 'Tweets classified per second'),
+                ('error_ratio', 'error_ratio', 'Share of failed calls'),
+                ('latency_p95_seconds', 'p95_latency', 'p95 call latency')):
+            lines += [f'# HELP tweet_analyzer_{name} {help_text} over the last {self.window_seconds:g}s.',
+                      f'# TYPE tweet_analyzer_{name} gauge',
+                      f'tweet_analyzer_{name} {roll[key]}']
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self):
+        if not self.textfile_path:
+            return
+        with self._write_lock:
+            text = self.render()
+            # write-then-rename so a scraper never reads a half-written file
+            tmp_path = f"{self.textfile_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, self.textfile_path)
+        with self._lock:
+            self._last_write = time.monotonic()
+            if self._log is not None:
+                self._log.flush()
+
+    def summary(self):
+        with self._lock:
+            total = sum(self.calls.values())
+            failed = sum(n for (_, outcome), n in self.calls.items() if outcome != 'ok')
+            retries = sum(self.retries.values())
+        return {'calls': total, 'failed_calls': failed, 'retries': retries, **self.rolling()}
+
+    def close(self):
+        self.write_textfile()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
@@ -0,0 +1,134 @@
+import re
+import random
+import threading
+import unicodedata
+
+# Climate / environment lexicon, grouped the way the classification labels are:
+# "explicit" terms point at "definitely yes", "adjacent" ones at "somewhat likely".
+# A trailing '*' matches any word starting with the stem (climat* -> climatique);
+# other Latin-script terms must match a whole word. Arabic terms match anywhere,
+# since articles and conjunctions attach to the word (و + ال + مناخ).
+# Accents and case are ignored on both sides.
+LEXICON = {
+    'en': {
+        'explicit': ['climat*', 'global warming', 'carbon', 'emission*', 'greenhouse', 'net zero', 'net-zero',
+                     'cop2*', 'cop3*', 'unfccc', 'ipcc', 'paris agreement', 'pollut*', 'oil spill', 'wildfire*',
+                     'deforestation', 'renewable*', 'solar', 'wind power', 'biodiversity', 'environment*',
+                     'fossil fuel*', 'sustainab*', 'green energy', 'clean energy'],
+        'adjacent': ['drought*', 'flood*', 'heatwave*', 'heat wave*', 'extreme heat', 'water scarcity',
+                     'water shortage*', 'cyclone*', 'hurricane*', 'storm*', 'rainfall', 'heavy rain*',
+                     'desertification', 'erosion', 'locust*', 'el nino', 'forest*', 'reforest*', 'tree planting',
+                     'plastic*', 'waste', 'conservation', 'wildlife', 'ocean*', 'sea level*', 'landslide*'],
+    },
+    'fr': {
+        'explicit': ['climat*', 'rechauffement', 'carbone', 'emissions', 'gaz a effet de serre', 'pollution*',
+                     'maree noire', 'incendies de foret', 'feux de brousse', 'deforestation', 'renouvelable*',
+                     'biodiversite', 'environnement*', 'developpement durable', 'energie propre', 'solaire'],
+        'adjacent': ['secheresse*', 'inondation*', 'canicule*', 'vague de chaleur', 'vagues de chaleur',
+                     "penurie d'eau", 'cyclone*', 'intemperie*', 'pluies diluviennes', 'desertification',
+                     'erosion', 'criquet*', 'reboisement', 'foret*', 'plastique*', 'dechets', 'ocean*',
+                     'glissement* de terrain'],
+    },
+    'pt': {
+        'explicit': ['clima', 'climatic*', 'aquecimento global', 'carbono', 'emissoes', 'efeito estufa',
+                     'poluicao', 'derrame de petroleo', 'incendio* florest*', 'desmatamento', 'desflorestacao',
+                     'renova*vel', 'renovaveis', 'biodiversidade', 'ambient*', 'sustentav*', 'energia limpa'],
+        'adjacent': ['seca', 'secas', 'cheia*', 'inundac*', 'onda de calor', 'ondas de calor', 'escassez de agua',
+                     'ciclone*', 'tempestade*', 'chuvas fortes', 'desertificacao', 'erosao', 'gafanhoto*',
+                     'reflorestamento', 'floresta*', 'plastico*', 'residuos', 'oceano*'],
+    },
+    'ar': {
+        'explicit': ['مناخ', 'الاحتباس الحراري', 'كربون', 'انبعاث', 'تلوث', 'بيئة', 'بيئي', 'طاقة متجددة',
+                     'الطاقة المتجددة', 'التنوع البيولوجي', 'حرائق الغابات', 'التصحر'],
+        'adjacent': ['جفاف', 'فيضان', 'فيضانات', 'سيول', 'موجة حر', 'الحرارة الشديدة', 'ندرة المياه',
+                     'شح المياه', 'غابات', 'إعصار', 'الأمطار', 'أمطار', 'الجراد', 'تشجير'],
+    },
+    'sw': {
+        'explicit': ['tabianchi', 'mabadiliko ya hali ya hewa', 'mazingira', 'uchafuzi', 'kaboni',
+                     'nishati mbadala', 'ukataji miti', 'hewa ukaa'],
+        'adjacent': ['ukame', 'mafuriko', 'joto kali', 'uhaba wa maji', 'misitu', 'msitu', 'upandaji miti',
+                     'kimbunga', 'mvua kubwa', 'nzige', 'taka'],
+    },
+}
+
+_ARABIC_RE = re.compile(r'[\u0600-\u06FF]')
+
+
+def fold(text):
+    """Casefold and strip diacritics (accents, Arabic harakat) for matching."""
+    decomposed = unicodedata.normalize('NFKD', str(text).casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _term_pattern(term):
+    term = fold(term)
+    prefix = term.endswith('*')
+    parts = [re.escape(p) for p in term.rstrip('*').split('*')]
+    body = r'\w*'.join(parts)
+    if _ARABIC_RE.search(term):
+        return body
+    return r'\b' + body + (r'\w*' if prefix else r'\b')
+
+
+def compile_lexicon(lexicon=LEXICON, languages=None):
+    """Compile every term of the chosen languages into one alternation, longest first."""
+    terms = set()
+    for lang, groups in lexicon.items():
+        if languages and lang not in languages:
+            continue
+        for words in groups.values():
+            terms.update(words)
+    patterns = sorted((_term_pattern(t) for t in terms), key=len, reverse=True)
+    return re.compile('|'.join(patterns))
+
+
+class KeywordPrefilter:
+    """
+    Local gate in front of the classifier.
+
+    decide() returns 'hit' when the tweet mentions any explicit or adjacent
+    theme (send it to the model), 'skipped' when it mentions none (label it
+    "unlikely" locally), or 'audit' for the audit_rate share of no-hit tweets
+    that are sent anyway so the filter's recall can be measured.
+    """
+
+    def __init__(self, lexicon=LEXICON, languages=None, audit_rate=0.02, seed=None):
+        self.pattern = compile_lexicon(lexicon, languages)
+        self.audit_rate = audit_rate
+        self._rng = random.Random(seed)
+        self.counts = {'hit': 0, 'skipped': 0, 'audit': 0}
+        self.audit_relevant = 0
+        self._lock = threading.Lock()
+
+    def matches(self, text):
+        return self.pattern.findall(fold(text))
+
+    def decide(self, text):
+        hit = self.pattern.search(fold(text)) is not None
+        with self._lock:
+            if hit:
+                decision = 'hit'
+            elif self.audit_rate and self._rng.random() < self.audit_rate:
+                decision = 'audit'
+            else:
+                decision = 'skipped'
+            self.counts[decision] += 1
+        return decision
+
+    def record_audit(self, label):
+        """Feed back the model's label for an 'audit' tweet."""
+        if label != 'unlikely':
+            with self._lock:
+                self.audit_relevant += 1
+
+    def summary(self):
+        """Counts plus the estimated share of skipped tweets the model would not have called 'unlikely'."""
+        audited = self.counts['audit']
+        miss_rate = self.audit_relevant / audited if audited else None
+        total = sum(self.counts.values())
+        return {
+            **self.counts,
+            'sent_share': round((self.counts['hit'] + audited) / total, 3) if total else 0.0,
+            'audit_relevant': self.audit_relevant,
+            'estimated_miss_rate': round(miss_rate, 3) if miss_rate is not None else None,
+        }
@@ -0,0 +1,113 @@
+import math
+import heapq
+import random
+from statistics import NormalDist
+
+
+def z_value(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+class StratifiedSample:
+    """
+    Sampling state for a stratified prevalence estimate.
+
+    strata maps a stratum key, e.g. (account, month), to the row indices in
+    that stratum. Rows are drawn without replacement in a shuffled order.
+    record() stores whether a drawn row was positive. estimate() combines
+    the strata over any domain (all strata, or one month's) with the usual
+    stratified estimator and a finite-population-corrected normal interval.
+    """
+
+    def __init__(self, strata, seed=0):
+        rng = random.Random(seed)
+        self.rows = {}
+        for key, indices in strata.items():
+            indices = list(indices)
+            rng.shuffle(indices)
+            self.rows[key] = indices
+        self.drawn = {key: 0 for key in self.rows}
+        self.n = {key: 0 for key in self.rows}
+        self.positives = {key: 0 for key in self.rows}
+
+    def size(self, key):
+        return len(self.rows[key])
+
+    def draw(self, key, k):
+        """The next k unsampled row indices of a stratum (fewer if it runs out)."""
+        start = self.drawn[key]
+        taken = self.rows[key][start:start + k]
+        self.drawn[key] += len(taken)
+        return taken
+
+    def record(self, key, positive):
+        self.n[key] += 1
+        self.positives[key] += int(bool(positive))
+
+    def _p_smoothed(self, key):
+        # keeps the variance of a 0/n or n/n stratum above zero while n is small
+        return (self.positives[key] + 0.5) / (self.n[key] + 1)
+
+    def _variance_term(self, key, weight, n):
+        N = self.size(key)
+        if n == 0 or n >= N:
+            return 0.0
+        p = self._p_smoothed(key)
+        return weight ** 2 * p * (1 - p) / n * (1 - n / N)
+
+    def estimate(self, keys=None, confidence=0.95):
+        keys = [k for k in (keys or self.rows) if self.size(k)]
+        total = sum(self.size(k) for k in keys)
+        if not total:
+            return None
+        point = 0.0
+        variance = 0.0
+        for key in keys:
+            weight = self.size(key) / total
+            if self.n[key]:
+                point += weight * self.positives[key] / self.n[key]
+            else:
+                # unsampled stratum: contributes the overall prior guess and full uncertainty
+                point += weight * 0.5
+                variance += weight ** 2 * 0.25
+            variance += self._variance_term(key, weight, self.n[key])
+        half = z_value(confidence) * math.sqrt(variance)
+        return {
+            'prevalence': round(point, 4),
+            'low': round(max(0.0, point - half), 4),
+            'high': round(min(1.0, point + half), 4),
+            'half_width': round(half, 4),
+            'sampled': sum(self.n[k] for k in keys),
+            'population': total,
+        }
+
+    def allocate(self, budget, keys=None):
+        """
+        Split `budget` further draws over the strata in keys, one at a time to
+        whichever stratum most reduces the domain variance (greedy Neyman
+        allocation). Returns {key: extra draws}.
+        """
+        keys = [k for k in (keys or self.rows) if self.size(k)]
+        total = sum(self.size(k) for k in keys)
+        planned = {k: 0 for k in keys}
+        heap = []
+
+        def gain(key):
+            n = self.drawn[key] + planned[key]
+            if n >= self.size(key):
+                return None
+            weight = self.size(key) / total
+            return self._variance_term(key, weight, max(n, 1)) - self._variance_term(key, weight, n + 1)
+
+        for key in keys:
+            g = gain(key)
+            if g is not None:
+                heapq.heappush(heap, (-g, key))
+        while budget > 0 and heap:
+            _, key = heapq.heappop(heap)
+            planned[key] += 1
+            budget -= 1
+            g = gain(key)
+            if g is not None:
+                heapq.heappush(heap, (-g, key))
+        return {k: v for k, v in planned.items() if v}
@@ -0,0 +1,108 @@
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Unicode-normalize and collapse whitespace so trivially different copies share a key."""
+    text = unicodedata.normalize('NFC', str(text))
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def cache_key(text, model, prompt_version, variant=''):
+    """
+    Content address of one classification: hash of the normalized text, the
+    model name and the prompt version. variant separates prompts that differ
+    per tweet (e.g. classification-only for English).
+    """
+    h = hashlib.sha256()
+    for part in (model, prompt_version, variant, normalize_text(text)):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of classification results, shared across country files and runs.
+
+    Backed by a single SQLite file so it can sit next to the outputs and be
+    used from the analyzer's worker threads. When the stored results exceed
+    max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, result TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        blob = json.dumps(result, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, result, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+            self._bytes += len(blob) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # drop the oldest-used entries until we are 10% under the limit
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._bytes <= target:
+                break
+            doomed.append((key,))
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "bytes": self._bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
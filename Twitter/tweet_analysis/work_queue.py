@@ -0,0 +1,340 @@
+import os
+import csv
+import json
+import time
+import socket
+import sqlite3
+import threading
+
+import pandas as pd
+
+from checkpoint import _jsonable
+
+# Rows are keyed by (input_file, record_id): the same tweet_url in two input
+# files is two rows. id is a surrogate key the workers pass back.
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS work_items (
+        id            INTEGER PRIMARY KEY,
+        record_id     TEXT NOT NULL,
+        input_file    TEXT NOT NULL,
+        seq           INTEGER,
+        row           TEXT NOT NULL,
+        status        TEXT NOT NULL DEFAULT 'pending',   -- pending / leased / done / failed
+        worker        TEXT,
+        lease_expires REAL,
+        attempts      INTEGER NOT NULL DEFAULT 0,
+        result        TEXT,
+        updated_at    REAL,
+        UNIQUE (input_file, record_id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_work_items_claim ON work_items (status, lease_expires)",
+]
+
+POSTGRES_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS work_items (
+        id            BIGSERIAL PRIMARY KEY,
+        record_id     TEXT NOT NULL,
+        input_file    TEXT NOT NULL,
+        seq           INTEGER,
+        row           TEXT NOT NULL,
+        status        TEXT NOT NULL DEFAULT 'pending',
+        worker        TEXT,
+        lease_expires DOUBLE PRECISION,
+        attempts      INTEGER NOT NULL DEFAULT 0,
+        result        TEXT,
+        updated_at    DOUBLE PRECISION,
+        UNIQUE (input_file, record_id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_work_items_claim ON work_items (status, lease_expires)",
+]
+
+# Columns copied over when an older queue file (keyed by record_id alone) is upgraded
+_V1_COLUMNS = "record_id, input_file, seq, row, status, worker, lease_expires, attempts, result, updated_at"
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Shared table of tweets to analyze, claimed in batches under time-limited leases.
+
+    Any number of worker processes open the same SQLite file. claim() hands
+    each worker rows nobody else holds: pending rows, plus rows whose lease
+    expired because their worker died or stalled. A worker keeps its leases
+    alive with heartbeat() while it is busy. complete() only accepts results
+    from the worker that currently holds the lease, so a row reclaimed after
+    an expiry is never written twice. Rows that fail max_attempts times, or
+    whose lease expires on their last attempt, are parked as 'failed'.
+
+    SQLite serializes the claim transactions, which is safe for many processes
+    on one host or a local disk. Do not put the file on a network share; for
+    several machines use PostgresWorkQueue (open_queue with a postgresql:// DSN).
+    """
+
+    BEGIN = "BEGIN IMMEDIATE"
+    CLAIM_LOCK = ""
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = self._connect(path)
+        self._create_schema()
+
+    def _connect(self, path):
+        conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=60000")
+        return conn
+
+    def _create_schema(self):
+        columns = [info[1] for info in self._conn.execute("PRAGMA table_info(work_items)")]
+        if columns and 'id' not in columns:
+            self._upgrade_v1()
+        for statement in SQLITE_SCHEMA:
+            self._conn.execute(statement)
+
+    def _upgrade_v1(self):
+        """Re-key a queue file written before rows were keyed by (input_file, record_id)."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("DROP INDEX IF EXISTS idx_work_items_claim")
+        self._conn.execute("ALTER TABLE work_items RENAME TO work_items_v1")
+        for statement in SQLITE_SCHEMA:
+            self._conn.execute(statement)
+        self._conn.execute(f"INSERT INTO work_items ({_V1_COLUMNS}) SELECT {_V1_COLUMNS} FROM work_items_v1 "
+                           "ORDER BY input_file, seq")
+        self._conn.execute("DROP TABLE work_items_v1")
+        self._conn.execute("COMMIT")
+
+    def _sql(self, query):
+        return query
+
+    def _execute(self, query, params=()):
+        return self._conn.execute(self._sql(query), params)
+
+    def _executemany(self, query, params_list):
+        """Run query once per parameter tuple; returns the total number of rows changed."""
+        return self._conn.executemany(self._sql(query), params_list).rowcount
+
+    def _stream(self, query, params=()):
+        """Iterate over a SELECT's rows without fetching them all at once."""
+        return self._execute(query, params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def enqueue_csv(self, input_file, chunksize=10000):
+        """Add every row of a tweets CSV; rows already queued (same file and tweet_url) are left alone."""
+        added = 0
+        seq = 0
+        for chunk in pd.read_csv(input_file, chunksize=chunksize):
+            items = []
+            for row in chunk.to_dict('records'):
+                seq += 1
+                url = row.get('tweet_url')
+                record_id = str(url) if isinstance(url, str) and url else f"{os.path.basename(input_file)}:row-{seq}"
+                row = {k: _jsonable(v) for k, v in row.items()}
+                items.append((record_id, input_file, seq, json.dumps(row, ensure_ascii=False), time.time()))
+            with self._lock:
+                self._execute(self.BEGIN)
+                added += self._executemany(
+                    "INSERT INTO work_items (record_id, input_file, seq, row, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (input_file, record_id) DO NOTHING", items)
+                self._execute("COMMIT")
+        return added
+
+    def claim(self, worker, limit):
+        """
+        Lease up to `limit` rows to worker. Expired leases that already used
+        their last attempt are parked as 'failed' instead of handed out again.
+
+        Returns:
+            list: [(item id, row dict)]; pass the ids to heartbeat/complete/release.
+        """
+        now = time.time()
+        with self._lock:
+            self._execute(self.BEGIN)
+            try:
+                self._execute(
+                    "UPDATE work_items SET status = 'failed', worker = NULL, lease_expires = NULL, updated_at = ? "
+                    "WHERE id IN (SELECT id FROM work_items "
+                    "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?" + self.CLAIM_LOCK + ")",
+                    (now, now, self.max_attempts))
+                rows = self._execute(
+                    "SELECT id, row FROM work_items "
+                    "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY input_file, seq LIMIT ?" + self.CLAIM_LOCK, (now, limit)).fetchall()
+                self._executemany(
+                    "UPDATE work_items SET status = 'leased', worker = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    [(worker, now + self.lease_seconds, now, item_id) for item_id, _ in rows])
+                self._execute("COMMIT")
+            except Exception:
+                self._execute("ROLLBACK")
+                raise
+        return [(item_id, json.loads(row)) for item_id, row in rows]
+
+    def heartbeat(self, worker, item_ids):
+        """Extend the worker's leases; returns how many it still holds."""
+        now = time.time()
+        with self._lock:
+            return self._executemany(
+                "UPDATE work_items SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                [(now + self.lease_seconds, now, item_id, worker) for item_id in item_ids])
+
+    def complete(self, worker, results):
+        """Store [(item id, result row)] for rows this worker still holds. Returns the number accepted."""
+        now = time.time()
+        with self._lock:
+            self._execute(self.BEGIN)
+            accepted = self._executemany(
+                "UPDATE work_items SET status = 'done', result = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                [(json.dumps({k: _jsonable(v) for k, v in row.items()}, ensure_ascii=False), now, item_id, worker)
+                 for item_id, row in results])
+            self._execute("COMMIT")
+        return accepted
+
+    def release(self, worker, item_ids):
+        """Give rows back after a failed attempt; they become 'failed' once out of attempts."""
+        now = time.time()
+        with self._lock:
+            self._executemany(
+                "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                [(self.max_attempts, now, item_id, worker) for item_id in item_ids])
+
+    def requeue_failed(self, input_file=None):
+        """Reset parked failures (of one input file, or all) to pending with a fresh attempt budget."""
+        query = "UPDATE work_items SET status = 'pending', attempts = 0, updated_at = ? WHERE status = 'failed'"
+        params = (time.time(),)
+        if input_file:
+            query += " AND input_file = ?"
+            params += (input_file,)
+        with self._lock:
+            return self._execute(query, params).rowcount
+
+    def stats(self, input_file=None):
+        """Row counts per status (of one input file, or all), plus 'expired_leases' over the whole queue."""
+        query = "SELECT status, COUNT(*) FROM work_items"
+        params = ()
+        if input_file:
+            query += " WHERE input_file = ?"
+            params = (input_file,)
+        with self._lock:
+            counts = dict(self._execute(query + " GROUP BY status", params).fetchall())
+            expired = self._execute(
+                "SELECT COUNT(*) FROM work_items WHERE status = 'leased' AND lease_expires < ?",
+                (time.time(),)).fetchone()[0]
+        counts['expired_leases'] = expired
+        return counts
+
+    def export(self, output_file, input_file=None):
+        """
+        Write the finished rows (of one input file, or all) to a CSV, in input
+        order. Rows parked as 'failed' are left out; stats(input_file) counts
+        them and requeue_failed() gives them another try.
+        """
+        query = "SELECT result FROM work_items WHERE status = 'done'"
+        params = ()
+        if input_file:
+            query += " AND input_file = ?"
+            params = (input_file,)
+        query += " ORDER BY input_file, seq"
+        tmp_path = output_file + '.tmp'
+        count = 0
+        # two passes over the cursor (columns, then rows) instead of a list of every record
+        with self._lock:
+            fieldnames = {}
+            for (result,) in self._stream(query, params):
+                fieldnames.update(dict.fromkeys(json.loads(result)))
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=list(fieldnames))
+                writer.writeheader()
+                for (result,) in self._stream(query, params):
+                    writer.writerow(json.loads(result))
+                    count += 1
+        os.replace(tmp_path, output_file)
+        return count
+
+
+class PostgresWorkQueue(WorkQueue):
+    """
+    The same queue in a PostgreSQL table, for workers on several machines.
+
+    claim() selects with FOR UPDATE SKIP LOCKED, so concurrent workers lease
+    disjoint rows without waiting on each other. Needs psycopg (version 3):
+    pip install "psycopg[binary]".
+    """
+
+    BEGIN = "BEGIN"
+    CLAIM_LOCK = " FOR UPDATE SKIP LOCKED"
+
+    def _connect(self, dsn):
+        try:
+            import psycopg
+        except ImportError:
+            raise ImportError("PostgresWorkQueue needs psycopg: pip install \"psycopg[binary]\"")
+        # autocommit, with explicit BEGIN / COMMIT around the multi-statement steps as in SQLite
+        return psycopg.connect(dsn, autocommit=True)
+
+    def _create_schema(self):
+        for statement in POSTGRES_SCHEMA:
+            self._conn.execute(statement)
+
+    def _sql(self, query):
+        return query.replace('?', '%s')
+
+    def _executemany(self, query, params_list):
+        # psycopg does not sum rowcount over executemany, so count per statement
+        changed = 0
+        with self._conn.cursor() as cur:
+            for params in params_list:
+                cur.execute(self._sql(query), params)
+                changed += max(cur.rowcount, 0)
+        return changed
+
+    def _stream(self, query, params=()):
+        # a named (server-side) cursor fetches in pages; a plain one would buffer every row
+        with self._conn.transaction():
+            with self._conn.cursor(name='work_items_export') as cur:
+                cur.itersize = 2000
+                cur.execute(self._sql(query), params)
+                yield from cur
+
+
+def open_queue(target, lease_seconds=300, max_attempts=3):
+    """PostgresWorkQueue for a postgresql:// DSN, else a WorkQueue on the SQLite file `target`."""
+    if target.startswith(('postgresql://', 'postgres://')):
+        return PostgresWorkQueue(target, lease_seconds, max_attempts)
+    return WorkQueue(target, lease_seconds, max_attempts)
+
+
+class LeaseKeeper:
+    """Background thread that heartbeats a worker's current leases every lease_seconds / 3."""
+
+    def __init__(self, queue, worker):
+        self.queue = queue
+        self.worker = worker
+        self.item_ids = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            if self.item_ids:
+                self.queue.heartbeat(self.worker, list(self.item_ids))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
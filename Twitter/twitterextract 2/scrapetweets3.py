@@ -2,8 +2,33 @@ import os
 import json
 import csv
 import re
+import posixpath
+import tarfile
+import zipfile
 from bs4 import BeautifulSoup
 
+from tweet_store import open_store, upsert_tweets, tweet_id_from_url
+
+# Archived tweets_html/<RUN_STAMP> directories that can be parsed in place.
+ARCHIVE_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz', '.zip')
+
+# BeautifulSoup tree builder: 'html.parser' (stdlib) or 'lxml' (faster, needs lxml).
+HTML_PARSER = 'html.parser'
+
+# X puts its own language guess on the tweetText div. These codes are not
+# languages (undetermined, media-only, hashtags-only, mentions-only, ...).
+NON_LANGUAGE_CODES = {'', 'und', 'zxx', 'qme', 'qht', 'qam', 'qct', 'qst', 'art'}
+
+# Small stopword lists for the offline fallback when the card has no usable lang.
+STOPWORDS = {
+    'en': {'the', 'and', 'of', 'to', 'in', 'is', 'for', 'on', 'with', 'we', 'our', 'this', 'that', 'are', 'will', 'have'},
+    'fr': {'le', 'la', 'les', 'et', 'des', 'du', 'de', 'un', 'une', 'pour', 'dans', 'est', 'nous', 'avec', 'sur', 'au'},
+    'pt': {'o', 'os', 'as', 'e', 'do', 'da', 'dos', 'das', 'um', 'uma', 'para', 'com', 'no', 'na', 'que', 'em', 'não'},
+    'sw': {'na', 'ya', 'wa', 'kwa', 'za', 'ni', 'katika', 'hii', 'leo', 'sisi', 'kuwa', 'pia'},
+}
+_ARABIC_RE = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]')
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
 
 def convert_k_notation(value):
     try:
@@ -18,17 +43,44 @@ def convert_k_notation(value):
 
 def parse_tweet_html(tweet_html_path, meta_path):
     with open(tweet_html_path, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
+        html_text = f.read()
 
     with open(meta_path, 'r', encoding='utf-8') as f:
         metadata = json.load(f)
 
+    tweet_id = os.path.basename(tweet_html_path).replace('tweet_', '').replace('.html', '')
+    return parse_tweet_markup(html_text, metadata, tweet_id)
+
+def detect_language(text):
+    """
+    Cheap offline language guess: Arabic by script, otherwise the stopword list
+    with the most hits. Returns an ISO 639-1 code, or 'und' when unsure.
+    """
+    if not text:
+        return 'und'
+    letters = [c for c in text if c.isalpha()]
+    if letters and len(_ARABIC_RE.findall(text)) / len(letters) > 0.3:
+        return 'ar'
+    words = [w.lower() for w in _WORD_RE.findall(text)]
+    scores = {lang: sum(1 for w in words if w in stop) for lang, stop in STOPWORDS.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] >= 2 else 'und'
+
+def parse_tweet_markup(html_text, metadata, tweet_id=''):
+    """
+    Parse one saved tweet card. Same as parse_tweet_html, but takes the card
+    markup and its already-loaded .meta.json instead of paths.
+    """
+    soup = BeautifulSoup(html_text, HTML_PARSER)
+
     data = {
+        "tweet_id": tweet_id_from_url(metadata.get("tweet_url", "")) or tweet_id,
         "display_name": "",
         "username": metadata.get("username", ""),
         "verified": False,
         "profile_image_url": "",
         "text": "",
+        "lang": "",
         "datetime": "",
         # FIX: Construct the URL from the filename
         "tweet_url": metadata.get("tweet_url", ""),
@@ -38,7 +90,9 @@ def parse_tweet_html(tweet_html_path, meta_path):
         "retweets": 0,
         "likes": 0,
         "views": 0,
-        "profile": ""
+        "profile": "",
+        "run_stamp": metadata.get("run_stamp", ""),
+        "collected_at": metadata.get("collected_at", "")
     }
 
 
@@ -61,6 +115,10 @@ def parse_tweet_html(tweet_html_path, meta_path):
     if tweet_text:
         data["text"] = tweet_text.get_text(separator=" ")
 
+    # Language: the card's own lang attribute, else the offline guess
+    lang = (tweet_text.get('lang', '') if tweet_text else '').lower()
+    data["lang"] = lang if lang not in NON_LANGUAGE_CODES else detect_language(data["text"])
+
     # Datetime
     time_elem = soup.find('time')
     if time_elem:
@@ -99,18 +157,83 @@ def parse_tweet_html(tweet_html_path, meta_path):
             break
 
     if not found_counts:
-        print(f" Metrics not found in aria-label for: {tweet_url}")
+        print(f" Metrics not found in aria-label for: {data['tweet_url']}")
 
     if data["username"]:
         data["profile"] = f"https://twitter.com/{data['username']}"
 
     return data
 
-def extract_all_tweets_to_csv(root_dir, output_csv):
-    tweet_rows = []
+def is_archive(path):
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+def _iter_archive_members(archive_path):
+    """Yield (member name, bytes) for every regular file, in archive order."""
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    yield info.filename, zf.read(info)
+    else:
+        # 'r|*' is tarfile's stream mode: one forward pass, no seeking, any compression
+        with tarfile.open(archive_path, 'r|*') as tf:
+            for member in tf:
+                if member.isfile():
+                    yield member.name, tf.extractfile(member).read()
+
+def iter_archive_tweets(archive_path):
+    """
+    Stream tweet cards out of a tar/zip archive without extracting it.
+
+    Each tweet_<id>.html is paired with the tweet_<id>.meta.json from the same
+    folder. Whichever half comes first is held in memory until its partner is
+    read, so an archive built from a tweets_html tree (where the pair sits
+    side by side) is handled in a single sequential read.
+
+    Yields:
+        tuple: (member name of the .html, html text, metadata dict, tweet id)
+    """
+    pending = {}
+    for name, payload in _iter_archive_members(archive_path):
+        base = posixpath.basename(name)
+        if not base.startswith('tweet_'):
+            continue
+        if base.endswith('.meta.json'):
+            kind, tweet_id = 'meta', base[len('tweet_'):-len('.meta.json')]
+        elif base.endswith('.html'):
+            kind, tweet_id = 'html', base[len('tweet_'):-len('.html')]
+        else:
+            continue
+
+        key = (posixpath.dirname(name), tweet_id)
+        other = pending.pop(key, None)
+        if other is None or other[0] == kind:
+            pending[key] = (kind, name, payload)
+            continue
+
+        if kind == 'html':
+            html_name, html_bytes, meta_bytes = name, payload, other[2]
+        else:
+            html_name, html_bytes, meta_bytes = other[1], other[2], payload
+        yield html_name, html_bytes.decode('utf-8'), json.loads(meta_bytes), tweet_id
+
+    unmatched = [name for kind, name, _ in pending.values() if kind == 'html']
+    if unmatched:
+        print(f" {len(unmatched)} tweet HTML files in {archive_path} have no .meta.json; skipped.")
+
+def _parse_archive(archive_path, tweet_rows):
+    for html_name, html_text, metadata, tweet_id in iter_archive_tweets(archive_path):
+        try:
+            tweet_rows.append(parse_tweet_markup(html_text, metadata, tweet_id))
+        except Exception as e:
+            print(f" Error parsing {archive_path}:{html_name}: {e}")
+
+def _walk_tweet_dir(root_dir, tweet_rows):
     for root, _, files in os.walk(root_dir):
         for file in files:
-            if file.endswith('.html') and file.startswith('tweet_'):
+            if is_archive(os.path.join(root, file)):
+                _parse_archive(os.path.join(root, file), tweet_rows)
+            elif file.endswith('.html') and file.startswith('tweet_'):
                 tweet_id = file.replace('tweet_', '').replace('.html', '')
                 html_path = os.path.join(root, file)
                 meta_path = os.path.join(root, f"tweet_{tweet_id}.meta.json")
@@ -121,10 +244,38 @@ def extract_all_tweets_to_csv(root_dir, output_csv):
                     except Exception as e:
                         print(f" Error parsing {html_path}: {e}")
 
+def extract_all_tweets_to_csv(root_dir, output_csv, store_path=None):
+    """
+    Parse every tweet_<id>.html under root_dir into output_csv.
+
+    root_dir may be a tweets_html directory, a .tar/.tar.gz/.tgz/.zip archive
+    of one, or a list of either. Archives found while walking a directory are
+    streamed too, so completed runs can stay compressed next to live ones.
+    If store_path is given the rows are also upserted into the SQLite tweet
+    store (see tweet_store.py), which de-duplicates re-captures by tweet_id.
+    """
+    roots = [root_dir] if isinstance(root_dir, str) else list(root_dir)
+
+    tweet_rows = []
+    for source in roots:
+        if is_archive(source):
+            _parse_archive(source, tweet_rows)
+        else:
+            _walk_tweet_dir(source, tweet_rows)
+
+    if store_path:
+        conn = open_store(store_path)
+        try:
+            written = upsert_tweets(conn, tweet_rows)
+        finally:
+            conn.close()
+        print(f" Upserted {written} tweets into {store_path}")
+
     fieldnames = [
-        "display_name", "username", "verified", "profile_image_url",
-        "text", "datetime", "tweet_url", "image_urls",
-        "replies", "retweets", "likes", "views", "profile"
+        "tweet_id", "display_name", "username", "verified", "profile_image_url",
+        "text", "lang", "datetime", "tweet_url", "image_urls",
+        "replies", "retweets", "likes", "views", "profile",
+        "run_stamp", "collected_at"
     ]
 
     with open(output_csv, 'w', newline='', encoding='utf-8') as f:
@@ -137,7 +288,7 @@ def extract_all_tweets_to_csv(root_dir, output_csv):
     print(f" Extracted {len(tweet_rows)} tweets to {output_csv}")
 
 if __name__ == "__main__":
-    extract_all_tweets_to_csv("tweets_html", "parsed_tweets_output.csv")
+    extract_all_tweets_to_csv("tweets_html", "parsed_tweets_output.csv", store_path="tweets.sqlite3")
 
 
 
@@ -0,0 +1,317 @@
+import os
+import sqlite3
+
+# === CONFIGURATION ===
+DEFAULT_DB_PATH = 'tweets.sqlite3'
+
+# Columns kept for every tweet. tweet_id is the identity; everything else is
+# overwritten by the most recent capture (by collected_at) on upsert.
+TWEET_COLUMNS = [
+    "tweet_id", "username", "display_name", "verified", "profile_image_url",
+    "text", "lang", "datetime", "tweet_url", "image_urls",
+    "replies", "retweets", "likes", "views", "profile",
+    "run_stamp", "collected_at",
+]
+
+# Written by tweet_analyzer, never touched by the scraper upsert.
+ANALYSIS_COLUMNS = ["climate_relevance_label", "english_translation"]
+
+# Counts tracked over time in the engagement table.
+METRIC_COLUMNS = ["replies", "retweets", "likes", "views"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    tweet_id TEXT PRIMARY KEY,
+    username TEXT,
+    display_name TEXT,
+    verified INTEGER,
+    profile_image_url TEXT,
+    text TEXT,
+    lang TEXT,
+    datetime TEXT,
+    tweet_url TEXT,
+    image_urls TEXT,
+    replies INTEGER,
+    retweets INTEGER,
+    likes INTEGER,
+    views INTEGER,
+    profile TEXT,
+    run_stamp TEXT,
+    collected_at TEXT,
+    first_run_stamp TEXT,
+    climate_relevance_label TEXT,
+    english_translation TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_username_datetime ON tweets (username, datetime);
+CREATE INDEX IF NOT EXISTS idx_tweets_run_stamp ON tweets (run_stamp);
+
+-- One row per observed change in a tweet's counts. A capture whose counts
+-- equal the previous snapshot is not stored, so each tweet's history is a
+-- step function: the counts hold until the next row.
+CREATE TABLE IF NOT EXISTS engagement (
+    tweet_id TEXT NOT NULL,
+    collected_at TEXT NOT NULL,
+    replies INTEGER,
+    retweets INTEGER,
+    likes INTEGER,
+    views INTEGER,
+    PRIMARY KEY (tweet_id, collected_at)
+) WITHOUT ROWID;
+"""
+
+
+def tweet_id_from_url(tweet_url):
+    """
+    Return the numeric status id from a tweet permalink, or '' if there is none.
+    Example: 'https://x.com/JDMahama/status/1790000000000000000' -> '1790000000000000000'
+    """
+    if not tweet_url or '/status/' not in tweet_url:
+        return ''
+    tail = tweet_url.split('/status/', 1)[1]
+    return tail.split('/')[0].split('?')[0]
+
+
+def open_store(db_path=DEFAULT_DB_PATH):
+    """
+    Open (and create if needed) the SQLite tweet store.
+    Rows come back as sqlite3.Row so they can be used like dicts.
+    """
+    parent = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(parent, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    _add_missing_columns(conn)
+    return conn
+
+
+def _add_missing_columns(conn):
+    """Bring stores created by an older version of this module up to TWEET_COLUMNS."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(tweets)")}
+    for col in TWEET_COLUMNS:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE tweets ADD COLUMN {col} TEXT")
+
+
+def _row_values(row):
+    values = {col: row.get(col, "") for col in TWEET_COLUMNS}
+    if not values["tweet_id"]:
+        values["tweet_id"] = tweet_id_from_url(values["tweet_url"])
+    if isinstance(values["image_urls"], (list, tuple)):
+        values["image_urls"] = ', '.join(values["image_urls"])
+    values["verified"] = int(bool(values["verified"]))
+    return values
+
+
+def upsert_tweets(conn, rows):
+    """
+    Insert or update parsed tweets keyed on tweet_id.
+
+    When the same tweet shows up in several RUN_STAMP folders the capture with
+    the latest collected_at wins; the earliest run that saw it is kept in
+    first_run_stamp. Every capture with a collected_at also feeds the
+    engagement history (see record_engagement). Rows without a resolvable
+    tweet_id are skipped.
+
+    Args:
+        conn: Connection from open_store().
+        rows (iterable of dict): Rows as produced by scrapetweets3.parse_tweet_html.
+
+    Returns:
+        int: Number of rows written.
+    """
+    cols = ", ".join(TWEET_COLUMNS)
+    placeholders = ", ".join(f":{c}" for c in TWEET_COLUMNS)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in TWEET_COLUMNS if c != "tweet_id")
+    sql = (
+        f"INSERT INTO tweets ({cols}, first_run_stamp) VALUES ({placeholders}, :run_stamp) "
+        f"ON CONFLICT(tweet_id) DO UPDATE SET {updates} "
+        f"WHERE excluded.collected_at >= COALESCE(tweets.collected_at, '')"
+    )
+
+    written = 0
+    with conn:
+        for row in rows:
+            values = _row_values(row)
+            if not values["tweet_id"]:
+                continue
+            conn.execute(sql, values)
+            # a capture without a run_stamp must not blank out a known first run
+            if values["run_stamp"]:
+                conn.execute(
+                    "UPDATE tweets SET first_run_stamp = ? WHERE tweet_id = ? "
+                    "AND (first_run_stamp IS NULL OR first_run_stamp = '' OR first_run_stamp > ?)",
+                    (values["run_stamp"], values["tweet_id"], values["run_stamp"]),
+                )
+            if values["collected_at"]:
+                _record_snapshot(conn, values)
+            written += 1
+    return written
+
+
+# ===============================
+# Engagement history
+# ===============================
+def _metrics(row):
+    return tuple(int(row[m] or 0) for m in METRIC_COLUMNS)
+
+
+def _record_snapshot(conn, values):
+    metrics = _metrics(values)
+    if not any(metrics):
+        # parse_tweet_html leaves all counts at 0 when the aria-label was missing
+        return False
+    tweet_id, collected_at = values["tweet_id"], values["collected_at"]
+    cols = ", ".join(METRIC_COLUMNS)
+
+    prev = conn.execute(
+        f"SELECT {cols} FROM engagement WHERE tweet_id = ? AND collected_at <= ? "
+        f"ORDER BY collected_at DESC LIMIT 1",
+        (tweet_id, collected_at),
+    ).fetchone()
+    if prev is not None and tuple(prev) == metrics:
+        return False
+
+    # Captures can be loaded out of order (e.g. an old archive re-parsed later);
+    # a following snapshot with the same counts is now redundant.
+    nxt = conn.execute(
+        f"SELECT collected_at, {cols} FROM engagement WHERE tweet_id = ? AND collected_at > ? "
+        f"ORDER BY collected_at LIMIT 1",
+        (tweet_id, collected_at),
+    ).fetchone()
+    if nxt is not None and tuple(nxt[1:]) == metrics:
+        conn.execute("DELETE FROM engagement WHERE tweet_id = ? AND collected_at = ?",
+                     (tweet_id, nxt[0]))
+
+    conn.execute(
+        f"INSERT OR REPLACE INTO engagement (tweet_id, collected_at, {cols}) VALUES (?, ?, ?, ?, ?, ?)",
+        (tweet_id, collected_at) + metrics,
+    )
+    return True
+
+
+def record_engagement(conn, tweet_id, collected_at, replies=0, retweets=0, likes=0, views=0):
+    """
+    Store one observation of a tweet's counts. Returns False when it was
+    skipped because the counts did not change since the previous snapshot.
+    """
+    values = {"tweet_id": tweet_id, "collected_at": collected_at, "replies": replies,
+              "retweets": retweets, "likes": likes, "views": views}
+    with conn:
+        return _record_snapshot(conn, values)
+
+
+def engagement_history(conn, tweet_id):
+    """Growth curve of one tweet: snapshots ordered by collected_at."""
+    return conn.execute(
+        "SELECT * FROM engagement WHERE tweet_id = ? ORDER BY collected_at", (tweet_id,)
+    ).fetchall()
+
+
+def account_engagement_history(conn, username, since=None, until=None):
+    """
+    Snapshots for every tweet of an account, ordered by tweet then time.
+    since/until bound the tweet's own datetime, like tweets_by_user.
+    """
+    sql = ("SELECT e.*, t.datetime FROM tweets t JOIN engagement e ON e.tweet_id = t.tweet_id "
+           "WHERE t.username = ?")
+    params = [username]
+    if since:
+        sql += " AND t.datetime >= ?"
+        params.append(since)
+    if until:
+        sql += " AND t.datetime < ?"
+        params.append(until)
+    sql += " ORDER BY t.datetime, e.tweet_id, e.collected_at"
+    return conn.execute(sql, params).fetchall()
+
+
+def account_engagement_totals(conn, username):
+    """
+    Account-level growth curve: at each collected_at, the summed counts of all
+    the account's tweets, carrying each tweet's last known counts forward.
+
+    Returns:
+        list of dict: {"collected_at", "replies", "retweets", "likes", "views"}.
+    """
+    rows = conn.execute(
+        "SELECT e.* FROM tweets t JOIN engagement e ON e.tweet_id = t.tweet_id "
+        "WHERE t.username = ? ORDER BY e.collected_at",
+        (username,),
+    ).fetchall()
+
+    latest = {}
+    totals = [0] * len(METRIC_COLUMNS)
+    curve = []
+    for row in rows:
+        metrics = _metrics(row)
+        old = latest.get(row["tweet_id"], (0,) * len(METRIC_COLUMNS))
+        latest[row["tweet_id"]] = metrics
+        totals = [t + new - prev for t, new, prev in zip(totals, metrics, old)]
+        point = {"collected_at": row["collected_at"], **dict(zip(METRIC_COLUMNS, totals))}
+        if curve and curve[-1]["collected_at"] == point["collected_at"]:
+            curve[-1] = point
+        else:
+            curve.append(point)
+    return curve
+
+
+def set_analysis(conn, tweet_id, label, translation):
+    """Record a tweet_analyzer result against a stored tweet."""
+    with conn:
+        conn.execute(
+            "UPDATE tweets SET climate_relevance_label = ?, english_translation = ? WHERE tweet_id = ?",
+            (label, translation, tweet_id),
+        )
+
+
+# ===============================
+# Query API
+# ===============================
+def get_tweet(conn, tweet_id):
+    return conn.execute("SELECT * FROM tweets WHERE tweet_id = ?", (tweet_id,)).fetchone()
+
+
+def tweets_by_user(conn, username, since=None, until=None):
+    """
+    All tweets by one account, oldest first, optionally bounded by datetime.
+    since/until are ISO strings compared against the tweet's <time datetime>,
+    e.g. tweets_by_user(conn, 'JDMahama', '2025-03-01', '2025-04-01') for March.
+    """
+    sql = "SELECT * FROM tweets WHERE username = ?"
+    params = [username]
+    if since:
+        sql += " AND datetime >= ?"
+        params.append(since)
+    if until:
+        sql += " AND datetime < ?"
+        params.append(until)
+    sql += " ORDER BY datetime"
+    return conn.execute(sql, params).fetchall()
+
+
+def tweets_in_run(conn, run_stamp):
+    """Tweets whose latest capture came from the given RUN_STAMP."""
+    return conn.execute(
+        "SELECT * FROM tweets WHERE run_stamp = ? ORDER BY username, datetime", (run_stamp,)
+    ).fetchall()
+
+
+def unanalyzed_tweets(conn, username=None):
+    """Tweets that tweet_analyzer has not labelled yet."""
+    sql = "SELECT * FROM tweets WHERE climate_relevance_label IS NULL"
+    params = []
+    if username:
+        sql += " AND username = ?"
+        params.append(username)
+    sql += " ORDER BY username, datetime"
+    return conn.execute(sql, params).fetchall()
+
+
+def count_by_user(conn):
+    """(username, tweet count) pairs, largest first."""
+    return conn.execute(
+        "SELECT username, COUNT(*) AS n FROM tweets GROUP BY username ORDER BY n DESC"
+    ).fetchall()
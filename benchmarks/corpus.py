@@ -0,0 +1,309 @@
+"""
+Synthetic corpus generator for the parser benchmarks.
+
+Produces saved tweet cards (tweet_<id>.html + tweet_<id>.meta.json, the layout
+gethtml_SB.py writes), X profile pages shaped like the ones in
+'Twitter Bios/profiles_html', and Facebook profile pages shaped like the ones in
+'Facebook Bios/fb_profiles_html'. Profile pages are built so the absolute
+XPaths in scrapexbios.XPATHS / fb_scrape.XPATHS resolve, then padded with
+script/style/svg noise up to the requested size, the way a real page_source is.
+"""
+import os
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from html import escape
+
+WORDS = {
+    'en': "the climate drought water rain minister president nation people today we will support "
+          "development energy forest youth economy health election peace together thank".split(),
+    'fr': "le la les climat sécheresse eau pluie ministre président nation peuple aujourd'hui nous "
+          "allons soutenir développement énergie forêt jeunesse économie santé paix ensemble merci".split(),
+    'pt': "o a os clima seca água chuva ministro presidente nação povo hoje vamos apoiar "
+          "desenvolvimento energia floresta juventude economia saúde paz juntos obrigado".split(),
+    'ar': "المناخ الجفاف المياه المطر الوزير الرئيس الوطن الشعب اليوم سوف ندعم التنمية الطاقة الغابات "
+          "الشباب الاقتصاد الصحة السلام معا شكرا".split(),
+}
+
+TRANSLATED_FROM = {'fr': 'French', 'pt': 'Portuguese', 'ar': 'Arabic'}
+
+
+# ===============================
+# Small helpers
+# ===============================
+def _sentence(rng, lang, n_words):
+    words = [rng.choice(WORDS[lang]) for _ in range(n_words)]
+    if rng.random() < 0.4:
+        words.append('#' + rng.choice(WORDS[lang]).capitalize())
+    if rng.random() < 0.3:
+        words.append(f"https://t.co/{rng.getrandbits(40):x}")
+    return ' '.join(words)
+
+
+def _abbrev(rng, n):
+    """Render a count the way X does in labels: 987, 1,234, 12.5K, 3.1M."""
+    if n >= 1_000_000 and rng.random() < 0.8:
+        return f"{n / 1_000_000:.1f}M"
+    if n >= 10_000 and rng.random() < 0.8:
+        return f"{n / 1000:.1f}K"
+    return f"{n:,}"
+
+
+def _count(rng):
+    return int(rng.lognormvariate(5, 2.2)) % 50_000_000
+
+
+def _noise(rng, n_bytes):
+    """Inline scripts, styles and svg paths, which make up most of a real page_source."""
+    chunks, size = [], 0
+    while size < n_bytes:
+        kind = rng.random()
+        if kind < 0.4:
+            body = ';'.join(f"window.__c{rng.getrandbits(24):x}={rng.getrandbits(32)}" for _ in range(40))
+            chunk = f'<script nonce="{rng.getrandbits(64):x}">{body}</script>'
+        elif kind < 0.7:
+            body = ''.join(f".r-{rng.getrandbits(24):x}{{margin:{rng.randint(0, 40)}px}}" for _ in range(40))
+            chunk = f'<style>{body}</style>'
+        else:
+            d = ' '.join(f"M{rng.randint(0, 24)} {rng.randint(0, 24)}L{rng.randint(0, 24)} {rng.randint(0, 24)}"
+                         for _ in range(30))
+            chunk = f'<svg viewBox="0 0 24 24" aria-hidden="true"><g><path d="{d}"></path></g></svg>'
+        chunks.append(chunk)
+        size += len(chunk)
+    return ''.join(chunks)
+
+
+# ===============================
+# Absolute-XPath tree builder
+# ===============================
+class _Node:
+    __slots__ = ('tag', 'attrs', 'children', 'text')
+
+    def __init__(self, tag, attrs=None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children = []
+        self.text = ''
+
+    def child(self, tag, index):
+        same = [c for c in self.children if c.tag == tag]
+        while len(same) < index:
+            node = _Node(tag, {'class': 'css-175oi2r'})
+            self.children.append(node)
+            same.append(node)
+        return same[index - 1]
+
+    def render(self, out):
+        attrs = ''.join(f' {k}="{escape(str(v))}"' for k, v in self.attrs.items())
+        out.append(f'<{self.tag}{attrs}>{escape(self.text)}')
+        for c in self.children:
+            c.render(out)
+        out.append(f'</{self.tag}>')
+
+
+def _place(root, xpath, text):
+    """
+    Create the elements an XPath of the form //*[@id="x"]/div/div[2]/span/text()
+    walks through, and put text at the end of it.
+    """
+    steps = xpath.split('/')
+    # steps: ['', '', '*[@id="x"]', 'div', ..., 'text()']
+    node = root
+    for step in steps[3:]:
+        if step == 'text()':
+            break
+        tag, index = step, 1
+        if '[' in step:
+            tag, index = step[:-1].split('[')
+            index = int(index)
+        node = node.child(tag, index)
+    node.text = text
+
+
+def _id_root(xpath):
+    return xpath.split('"')[1]
+
+
+# ===============================
+# Tweet cards
+# ===============================
+def make_tweet_card(rng, tweet_id, username, lang=None):
+    """Return (outerHTML of one <article data-testid="tweet">, meta dict)."""
+    lang = lang or rng.choice(['en', 'fr', 'fr', 'pt', 'ar'])
+    display = username.replace('_', ' ')
+    text = _sentence(rng, lang, rng.randint(6, 45))
+    when = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randint(0, 400_000))
+
+    replies, reposts, likes, views = (_count(rng) for _ in range(4))
+    style = rng.random()
+    if style < 0.5:
+        label = (f"{_abbrev(rng, replies)} replies, {_abbrev(rng, reposts)} reposts, "
+                 f"{_abbrev(rng, likes)} likes, {_abbrev(rng, views)} views")
+    elif style < 0.7:
+        # singular forms and narrow no-break spaces
+        label = f"1\u202freply, 1\u202frepost, {_abbrev(rng, likes)}\u202flikes, {_abbrev(rng, views)}\u202fviews"
+    elif style < 0.85:
+        # older cards have no view count
+        label = f"{_abbrev(rng, replies)} replies, {_abbrev(rng, reposts)} reposts, {_abbrev(rng, likes)} likes"
+    else:
+        label = f"{_abbrev(rng, likes)} likes, {_abbrev(rng, views)} views"
+
+    parts = [
+        f'<article aria-labelledby="id__{tweet_id}" role="article" tabindex="0" data-testid="tweet">',
+        '<div class="css-175oi2r"><div class="css-175oi2r r-18u37iz">',
+        f'<div data-testid="Tweet-User-Avatar"><img alt="Image" draggable="true" '
+        f'src="https://pbs.twimg.com/profile_images/{tweet_id}/avatar_normal.jpg"></div>',
+        f'<div data-testid="User-Name"><div><a href="/{username}"><span>{escape(display)}</span></a>',
+    ]
+    if rng.random() < 0.5:
+        parts.append('<svg aria-label="Verified account" role="img" viewBox="0 0 22 22"><g><path d="M0 0"></path></g></svg>')
+    parts.append(
+        f'</div><div><a href="/{username}"><span>@{username}</span></a>'
+        f'<a href="/{username}/status/{tweet_id}"><time datetime="{when.strftime("%Y-%m-%dT%H:%M:%S.000Z")}">'
+        f'{when.strftime("%b %d")}</time></a></div></div>'
+    )
+    if lang != 'en' and rng.random() < 0.25:
+        parts.append(f'<div><span>Translated from {TRANSLATED_FROM[lang]} by Google</span>'
+                     '<div role="button"><span>Show original</span></div></div>')
+    parts.append(f'<div lang="{lang}" dir="auto" data-testid="tweetText"><span>{escape(text)}</span></div>')
+
+    n_media = rng.choices([0, 1, 2, 3, 4], weights=[50, 30, 10, 5, 5])[0]
+    if n_media:
+        parts.append('<div data-testid="tweetPhoto">')
+        for i in range(n_media):
+            parts.append(f'<img alt="Image" draggable="true" '
+                         f'src="https://pbs.twimg.com/media/G{tweet_id}{i}?format=jpg&amp;name=small">')
+        parts.append('</div>')
+
+    parts.append(f'<div aria-label="{escape(label)}" role="group">')
+    for testid in ('reply', 'retweet', 'like'):
+        parts.append(f'<button data-testid="{testid}" type="button"><svg viewBox="0 0 24 24"><g><path d="M1 1"></path></g></svg></button>')
+    parts.append('</div></div></div></article>')
+
+    meta = {
+        "tweet_url": f"https://x.com/{username}/status/{tweet_id}",
+        "collected_at": datetime.now(timezone.utc).isoformat(),
+        "run_stamp": "2025-10-19",
+    }
+    return ''.join(parts), meta
+
+
+def write_tweet_corpus(out_dir, n_files, seed=0, size_kb=None):
+    """
+    Write n_files tweet cards under out_dir/<username>/. Returns the file paths written.
+    With size_kb, each card is followed by script/style/svg noise up to that size.
+    """
+    rng = random.Random(seed)
+    # separate stream, so padding does not change the cards themselves
+    noise_rng = random.Random(seed + 1)
+    users = [f"Official_{i:03d}" for i in range(max(1, n_files // 200))]
+    paths = []
+    for i in range(n_files):
+        username = rng.choice(users)
+        tweet_id = str(1_800_000_000_000_000_000 + i)
+        card, meta = make_tweet_card(rng, tweet_id, username)
+        if size_kb:
+            card += _noise(noise_rng, max(0, size_kb * 1024 - len(card)))
+        folder = os.path.join(out_dir, username)
+        os.makedirs(folder, exist_ok=True)
+        html_path = os.path.join(folder, f"tweet_{tweet_id}.html")
+        meta_path = os.path.join(folder, f"tweet_{tweet_id}.meta.json")
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(card)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        paths.append((html_path, meta_path))
+    return paths
+
+
+# ===============================
+# Profile pages
+# ===============================
+def make_x_profile_page(rng, username, xpaths, size_kb=330):
+    """An X profile page_source on which every XPath in scrapexbios.XPATHS resolves."""
+    lang = rng.choice(['en', 'fr', 'pt', 'ar'])
+    values = {
+        'Bio': _sentence(rng, lang, rng.randint(5, 30)),
+        'Date Joined': f"Joined {rng.choice(['March', 'July', 'October'])} {rng.randint(2009, 2024)}",
+        'Following': _abbrev(rng, _count(rng) % 5000),
+        'Followers': _abbrev(rng, _count(rng)),
+        'Posts': f"{_abbrev(rng, _count(rng) % 90_000)} posts",
+    }
+    root = _Node('div', {'id': _id_root(next(iter(xpaths.values())))})
+    for key, xp in xpaths.items():
+        _place(root, xp, values.get(key, ''))
+    out = []
+    root.render(out)
+    verified = ('<svg aria-label="Verified account" role="img"><g><path d="M0 0"></path></g></svg>'
+                if rng.random() < 0.5 else '')
+    header = f'<!DOCTYPE html><html dir="ltr" lang="en"><head><title>{username} / X</title></head><body>'
+    page = header + verified + ''.join(out)
+    return page + _noise(rng, max(0, size_kb * 1024 - len(page))) + '</body></html>'
+
+
+def make_fb_profile_page(rng, username, xpaths, size_kb=600):
+    """A Facebook page_source on which the fb_scrape.XPATHS primary paths resolve."""
+    values = {
+        'Username': username.replace('.', ' ').title(),
+        'Followers': _abbrev(rng, _count(rng)),
+        'Following': str(_count(rng) % 2000),
+        'Intro': _sentence(rng, rng.choice(['en', 'fr', 'pt']), rng.randint(4, 20)),
+    }
+    primary = {k: v for k, v in xpaths.items() if not k.endswith('_Alt')}
+    root = _Node('div', {'id': _id_root(next(iter(primary.values())))})
+    for key, xp in primary.items():
+        _place(root, xp, values.get(key, ''))
+    out = []
+    root.render(out)
+    # Facebook renders a notifications <h1> before the profile name.
+    page = ('<!DOCTYPE html><html lang="en"><head><title>Facebook</title></head><body>'
+            '<div role="banner"><h1>Notifications</h1></div>' + ''.join(out))
+    return page + _noise(rng, max(0, size_kb * 1024 - len(page))) + '</body></html>'
+
+
+def write_x_profile_corpus(out_dir, n_files, xpaths, size_kb=330, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(n_files):
+        username = f"Official_{i:04d}"
+        path = os.path.join(out_dir, f"{username}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(make_x_profile_page(rng, username, xpaths, size_kb))
+        paths.append(path)
+    return paths
+
+
+def write_fb_profile_corpus(out_dir, n_files, xpaths, size_kb=600, seed=0):
+    """Write one <account>/<account>.html per profile, the fb_profiles_html layout."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(n_files):
+        account = f"official.{i:04d}"
+        folder = os.path.join(out_dir, account)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{account}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(make_fb_profile_page(rng, account, xpaths, size_kb))
+        paths.append((path, account))
+    return paths
+
+
+# ===============================
+# Analyzer input
+# ===============================
+def write_analyzer_csv(path, n_tweets, seed=0):
+    """Write a tweets CSV in the shape tweet_analyzer reads (tweet_text, tweet_url, lang)."""
+    import csv
+    rng = random.Random(seed)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['tweet_text', 'tweet_url', 'lang'])
+        writer.writeheader()
+        for i in range(n_tweets):
+            lang = rng.choice(['en', 'en', 'fr', 'pt', 'ar'])
+            writer.writerow({
+                'tweet_text': _sentence(rng, lang, rng.randint(8, 30)),
+                'tweet_url': f"https://x.com/Official_{i % 50:03d}/status/{1_800_000_000_000_000_000 + i}",
+                'lang': lang,
+            })
+    return path
@@ -0,0 +1,144 @@
+"""
+Load test for tweet_analyzer.process_tweets_from_csv against the local mock
+Gemini server (see mock_gemini.py), so throughput, retry and resume behaviour
+can be measured without API quota.
+
+Generates a synthetic tweets CSV, starts the mock server, points
+tweet_analyzer.GEMINI_URL at it and runs the analyzer with the given
+concurrency / batching. Reports tweets/s, generateContent latency
+percentiles (per call, including rate-limiter pacing and client-side
+retries), and how many 429s and malformed responses were served and absorbed.
+
+Run from the repository root:
+    python -m benchmarks.load_test_analyzer --tweets 2000 --concurrency 8 --batch-size 10
+    python -m benchmarks.load_test_analyzer --rate-429 0.05 --malformed 0.02 --resume-check
+    python -m benchmarks.load_test_analyzer --quota 100 --quota-window 10 --latency-ms 50
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+
+from benchmarks import corpus
+from benchmarks.mock_gemini import add_config_arguments, config_from_args, start_server
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANALYZER_DIR = os.path.join(REPO_ROOT, 'Twitter', 'tweet_analysis')
+
+
+def load_analyzer():
+    if ANALYZER_DIR not in sys.path:
+        sys.path.insert(0, ANALYZER_DIR)
+    import tweet_analyzer
+    return tweet_analyzer
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    pos = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[pos]
+
+
+class CallTimer:
+    """Wraps tweet_analyzer.call_gemini to record the wall time of every call."""
+
+    def __init__(self, call):
+        self.call = call
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = self.call(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies.append(elapsed)
+        return result
+
+
+def run_once(ta, input_csv, output_csv, args, rate_limiter, retry_failed=True):
+    """One process_tweets_from_csv pass with its console output swallowed. Returns (seconds, new tweets)."""
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        ta.process_tweets_from_csv(input_csv, output_csv, 'mock-key', concurrency=args.concurrency,
+                                   rate_limiter=rate_limiter, batch_size=args.batch_size,
+                                   flush_every=args.flush_every, retry_failed=retry_failed)
+    elapsed = time.perf_counter() - start
+    new = 0
+    for line in log.getvalue().splitlines():
+        if line.startswith('Analysis complete.'):
+            new = int(line.split()[2])
+    return elapsed, new
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tweets', type=int, default=1000, help='tweets in the synthetic input (default 1000)')
+    parser.add_argument('--concurrency', type=int, default=8, help='analyzer workers (default 8)')
+    parser.add_argument('--batch-size', type=int, default=10, help='tweets per request (default 10)')
+    parser.add_argument('--initial-rate', type=float, default=5.0, help='AIMD starting rate in req/s (default 5)')
+    parser.add_argument('--max-rate', type=float, default=50.0, help='AIMD ceiling in req/s (default 50)')
+    parser.add_argument('--flush-every', type=int, default=100, help='checkpoint flush size (default 100)')
+    parser.add_argument('--resume-check', action='store_true',
+                        help='run the analyzer a second time and check that nothing is redone')
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    ta = load_analyzer()
+    from analysis_engine import AIMDRateLimiter
+
+    server = start_server(config_from_args(args))
+    ta.GEMINI_URL = server.url_template
+    timer = CallTimer(ta.call_gemini)
+    ta.call_gemini = timer
+    limiter = AIMDRateLimiter(initial_rate=args.initial_rate, max_rate=args.max_rate)
+
+    status = 0
+    with tempfile.TemporaryDirectory(prefix='analyzer-load-') as tmp:
+        input_csv = corpus.write_analyzer_csv(os.path.join(tmp, 'tweets.csv'), args.tweets)
+        output_csv = os.path.join(tmp, 'analyzed.csv')
+        print(f"[INFO] {args.tweets} tweets, concurrency {args.concurrency}, batch size {args.batch_size}, "
+              f"mock at {server.url_template.split('/v1beta')[0]}")
+
+        elapsed, new = run_once(ta, input_csv, output_csv, args, limiter)
+
+        import pandas as pd
+        out = pd.read_csv(output_csv)
+        # failed API calls and unparseable answers alike end up as 'failed' rows
+        failed = int((out['analysis_status'] == 'failed').sum())
+        lat = sorted(timer.latencies)
+        print(f"{'tweets/s':<22} {new / elapsed:>10.1f}   ({new} tweets in {elapsed:.1f}s)")
+        print(f"{'requests/s':<22} {len(lat) / elapsed:>10.1f}   ({len(lat)} generateContent calls)")
+        print(f"{'latency p50/p95/p99':<22} {percentile(lat, 50) * 1000:>7.0f} / {percentile(lat, 95) * 1000:.0f} / "
+              f"{percentile(lat, 99) * 1000:.0f} ms")
+        print(f"{'429s served':<22} {server.stats['throttled'] + server.stats['quota_rejected']:>10}   "
+              f"(random {server.stats['throttled']}, quota {server.stats['quota_rejected']}); "
+              f"limiter backed off {limiter.throttled}x, final rate {limiter.rate:.1f} req/s")
+        print(f"{'malformed served':<22} {server.stats['malformed']:>10}")
+        print(f"{'failed rows':<22} {failed:>10}   (analysis_status 'failed')")
+        if len(out) != args.tweets:
+            print(f"[ERROR] output has {len(out)} rows, expected {args.tweets}")
+            status = 1
+
+        if args.resume_check:
+            # failed rows would be retried by default; only successes must not be redone
+            _, redone = run_once(ta, input_csv, output_csv, args, limiter, retry_failed=False)
+            if redone:
+                print(f"[ERROR] resume re-analyzed {redone} tweets")
+                status = 1
+            else:
+                print("[OK] Resume: second run found every tweet already processed.")
+
+    server.shutdown()
+    server.server_close()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
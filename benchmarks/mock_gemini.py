@@ -0,0 +1,205 @@
+"""
+Local stand-in for the Gemini generateContent endpoint.
+
+Answers POST /v1beta/models/<model>:generateContent with the same envelope as
+the real API (candidates[0].content.parts[0].text plus usageMetadata), for
+both the single-tweet OBJECT schema and the batched ARRAY schema used by
+tweet_analyzer. Latency, 429s, malformed bodies and per-window quotas are
+configurable, so throughput, retry and resume behaviour can be exercised
+without spending API quota.
+
+Run standalone:
+    python -m benchmarks.mock_gemini --port 8089 --rate-429 0.05
+and point tweet_analyzer.GEMINI_URL at
+    http://127.0.0.1:8089/v1beta/models/{model}:generateContent?key={api_key}
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LABELS = ["definitely yes", "somewhat likely", "unlikely"]
+_CLIMATE_RE = re.compile(r'climat|carbon|emission|pollut|warming', re.IGNORECASE)
+_ADJACENT_RE = re.compile(r'drought|flood|heat|forest|rain|water', re.IGNORECASE)
+_NUMBERED_RE = re.compile(r'^(\d+)\.(?: \[English[^\]]*\])? "(.*)"$', re.MULTILINE)
+_TWEET_RE = re.compile(r'Tweet text: "(.*)"', re.DOTALL)
+
+
+class MockConfig:
+    """
+    latency_ms / latency_sigma: log-normal service time (median, shape).
+    rate_429: probability of a plain 429.
+    malformed_rate: probability of a 200 whose model text is not valid JSON.
+    quota / quota_window: at most `quota` accepted requests per window of
+        quota_window seconds; beyond that, 429 with Retry-After until the
+        window resets.
+    """
+
+    def __init__(self, latency_ms=300.0, latency_sigma=0.5, rate_429=0.0, malformed_rate=0.0,
+                 quota=None, quota_window=60.0, seed=None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.rate_429 = rate_429
+        self.malformed_rate = malformed_rate
+        self.quota = quota
+        self.quota_window = quota_window
+        self.rng = random.Random(seed)
+
+
+def mock_label(text):
+    """Deterministic label so repeated runs (and the cache) see stable answers."""
+    if _CLIMATE_RE.search(text):
+        return LABELS[0]
+    if _ADJACENT_RE.search(text):
+        return LABELS[1]
+    return LABELS[2]
+
+
+class MockGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.stats = {'requests': 0, 'ok': 0, 'throttled': 0, 'quota_rejected': 0, 'malformed': 0}
+
+    @property
+    def url_template(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1beta/models/{{model}}:generateContent?key={{api_key}}"
+
+    def decide(self):
+        """Pick the outcome of one request: ('ok'|'throttled'|'quota_rejected'|'malformed', retry_after, delay)."""
+        cfg = self.config
+        with self.lock:
+            self.stats['requests'] += 1
+            delay = cfg.rng.lognormvariate(0, cfg.latency_sigma) * cfg.latency_ms / 1000.0
+            roll = cfg.rng.random()
+            retry_after = None
+            if cfg.quota is not None:
+                now = time.monotonic()
+                if now - self.window_start >= cfg.quota_window:
+                    self.window_start, self.window_count = now, 0
+                if self.window_count >= cfg.quota:
+                    outcome = 'quota_rejected'
+                    retry_after = max(1, int(self.window_start + cfg.quota_window - now + 0.999))
+                    self.stats[outcome] += 1
+                    return outcome, retry_after, 0.0
+                self.window_count += 1
+            if roll < cfg.rate_429:
+                outcome, delay = 'throttled', delay / 10
+            elif roll < cfg.rate_429 + cfg.malformed_rate:
+                outcome = 'malformed'
+            else:
+                outcome = 'ok'
+            self.stats[outcome] += 1
+        return outcome, retry_after, delay
+
+
+def _answer(body):
+    """Model text for a generateContent request body, shaped by its responseSchema."""
+    prompt = body['contents'][0]['parts'][0]['text']
+    schema = body.get('generationConfig', {}).get('responseSchema', {})
+    if schema.get('type') == 'ARRAY':
+        items = [{"id": int(num), "classification": mock_label(text), "english_translation": text}
+                 for num, text in _NUMBERED_RE.findall(prompt)]
+        return json.dumps(items)
+    match = _TWEET_RE.search(prompt)
+    text = match.group(1) if match else prompt
+    result = {"classification": mock_label(text)}
+    if 'english_translation' in schema.get('properties', {}):
+        result["english_translation"] = text
+    return json.dumps(result)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if not self.path.split('?')[0].endswith(':generateContent'):
+            self._send(404, {"error": {"code": 404, "message": "not found"}})
+            return
+        raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        outcome, retry_after, delay = self.server.decide()
+        time.sleep(delay)
+        if outcome in ('throttled', 'quota_rejected'):
+            headers = {'Retry-After': str(retry_after)} if retry_after else None
+            self._send(429, {"error": {"code": 429, "message": "Resource has been exhausted",
+                                       "status": "RESOURCE_EXHAUSTED"}}, headers)
+            return
+        try:
+            body = json.loads(raw)
+            text = _answer(body)
+        except (ValueError, KeyError, IndexError) as e:
+            self._send(400, {"error": {"code": 400, "message": f"bad request: {e}"}})
+            return
+        if outcome == 'malformed':
+            text = text[:max(1, len(text) // 2)]
+        prompt_tokens = len(raw) // 4 + 1
+        output_tokens = len(text) // 4 + 1
+        self._send(200, {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens,
+                              "totalTokenCount": prompt_tokens + output_tokens},
+        })
+
+
+def start_server(config, host='127.0.0.1', port=0):
+    """Start a MockGeminiServer on a background thread and return it."""
+    server = MockGeminiServer((host, port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='median service time (default 300)')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='log-normal shape (default 0.5)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='share of requests answered with 429')
+    parser.add_argument('--malformed', type=float, default=0.0, help='share of responses with broken JSON')
+    parser.add_argument('--quota', type=int, help='accepted requests per quota window')
+    parser.add_argument('--quota-window', type=float, default=60.0, help='quota window in seconds')
+    parser.add_argument('--seed', type=int, help='random seed')
+
+
+def config_from_args(args):
+    return MockConfig(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma, rate_429=args.rate_429,
+                      malformed_rate=args.malformed, quota=args.quota, quota_window=args.quota_window,
+                      seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+    server = MockGeminiServer((args.host, args.port), config_from_args(args))
+    print(f"[INFO] Mock Gemini listening; GEMINI_URL = {server.url_template}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[DONE] {server.stats}")
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Throughput benchmarks for the saved-HTML parsers.
+
+Generates a synthetic corpus (see corpus.py), then runs each parser/backend
+pair in a fresh process and reports files/s, MB/s and peak RSS. Results can be
+saved as a baseline; later runs are compared against it and exit non-zero on
+a regression.
+
+Run from the repository root:
+    python -m benchmarks.run_parsers                    # compare against benchmarks/baselines.json
+    python -m benchmarks.run_parsers --save-baseline    # record new numbers
+    python -m benchmarks.run_parsers --only tweets --files 5000
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import importlib
+import contextlib
+import multiprocessing
+
+from benchmarks import corpus
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, 'benchmarks', 'baselines.json')
+
+# Where each parser script lives; they are plain scripts, not an installed package.
+PARSER_DIRS = {
+    'scrapetweets3': os.path.join('Twitter', 'twitterextract 2'),
+    'scrapexbios': os.path.join('Twitter', 'Twitter Bios'),
+    'fb_scrape': os.path.join('Facebook', 'Facebook Bios'),
+}
+
+
+def load_parser_module(name):
+    folder = os.path.join(REPO_ROOT, PARSER_DIRS[name])
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    return importlib.import_module(name)
+
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# ===============================
+# Benchmarks: corpus writer + per-file parse call
+# ===============================
+def _write_tweets(out_dir, n_files, size_kb):
+    return corpus.write_tweet_corpus(out_dir, n_files, size_kb=size_kb)
+
+
+def _parse_tweets(backend, items):
+    mod = load_parser_module('scrapetweets3')
+    mod.HTML_PARSER = backend
+    for html_path, meta_path in items:
+        mod.parse_tweet_html(html_path, meta_path)
+
+
+def _write_x_bios(out_dir, n_files, size_kb):
+    xpaths = load_parser_module('scrapexbios').XPATHS
+    return corpus.write_x_profile_corpus(out_dir, n_files, xpaths, size_kb=size_kb)
+
+
+def _parse_x_bios(backend, items):
+    mod = load_parser_module('scrapexbios')
+    if backend == 'lxml-xpath-pool':
+        # peak RSS covers only the parent; the pool's workers are separate processes
+        mod.parse_files(items)
+        return
+    for path in items:
+        mod.extract_profile_data(path)
+
+
+def _write_fb_bios(out_dir, n_files, size_kb):
+    xpaths = load_parser_module('fb_scrape').XPATHS
+    return corpus.write_fb_profile_corpus(out_dir, n_files, xpaths, size_kb=size_kb)
+
+
+def _parse_fb_bios(backend, items):
+    mod = load_parser_module('fb_scrape')
+    for path, account in items:
+        mod.extract_profile_data(path, account)
+
+
+# name -> (backends, corpus writer, parse loop, default file count, default page size in KB)
+BENCHMARKS = {
+    'tweets': (['html.parser', 'lxml'], _write_tweets, _parse_tweets, 2000, None),
+    'x_bios': (['lxml-xpath', 'lxml-xpath-pool'], _write_x_bios, _parse_x_bios, 100, 330),
+    'fb_bios': (['lxml-xpath'], _write_fb_bios, _parse_fb_bios, 60, 600),
+}
+
+
+def _item_paths(item):
+    if isinstance(item, str):
+        return [item]
+    return [p for p in item if isinstance(p, str) and os.path.isfile(p)]
+
+
+def _run_one(name, backend, items, queue):
+    """Child process body: parse every item once and report timings."""
+    _, _, parse, _, _ = BENCHMARKS[name]
+    n_bytes = sum(os.path.getsize(p) for item in items for p in _item_paths(item))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            parse(backend, items)
+            elapsed = time.perf_counter() - start
+    except ImportError as e:
+        queue.put({'skipped': str(e)})
+        return
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+        return
+    queue.put({
+        'files': len(items),
+        'seconds': round(elapsed, 4),
+        'files_per_s': round(len(items) / elapsed, 1),
+        'mb_per_s': round(n_bytes / (1024 * 1024) / elapsed, 2),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+    })
+
+
+def run_benchmark(name, backend, items):
+    """Run one parser/backend pair in a fresh process so peak RSS is its own."""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_one, args=(name, backend, items, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+# ===============================
+# Baselines
+# ===============================
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    baseline = load_baseline(path)
+    baseline.update(results)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"[DONE] Baseline saved to {path}")
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions beyond the given tolerance."""
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if not base or 'files_per_s' not in res or 'files_per_s' not in base:
+            continue
+        if res['files_per_s'] < base['files_per_s'] * (1 - tolerance):
+            regressions.append(f"{key}: {res['files_per_s']} files/s vs baseline {base['files_per_s']}")
+        if res['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{key}: peak RSS {res['peak_rss_mb']} MB vs baseline {base['peak_rss_mb']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', choices=sorted(BENCHMARKS), action='append',
+                        help='run only this benchmark (repeatable)')
+    parser.add_argument('--files', type=int, help='files per benchmark (default: per-benchmark)')
+    parser.add_argument('--size-kb', type=int, help='page size in KB (default: per-benchmark; tweet cards unpadded)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON path')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed slowdown / RSS growth before flagging a regression (default 0.15)')
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='parser-bench-') as tmp:
+        for name in args.only or sorted(BENCHMARKS):
+            backends, write, _, default_files, default_kb = BENCHMARKS[name]
+            n_files = args.files or default_files
+            size_kb = args.size_kb or default_kb
+            try:
+                items = write(os.path.join(tmp, name), n_files, size_kb)
+            except ImportError as e:
+                print(f"[SKIP] {name}: {e}")
+                continue
+            for backend in backends:
+                key = f"{name}/{backend}"
+                res = run_benchmark(name, backend, items)
+                if 'skipped' in res:
+                    print(f"[SKIP] {key}: {res['skipped']}")
+                    continue
+                if 'error' in res:
+                    print(f"[ERROR] {key}: {res['error']}")
+                    continue
+                results[key] = res
+                print(f"{key:<28} {res['files']:>6} files  {res['files_per_s']:>9.1f} files/s  "
+                      f"{res['mb_per_s']:>7.2f} MB/s  peak RSS {res['peak_rss_mb']:>7.1f} MB")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"[INFO] No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"[REGRESSION] {line}")
+    if not regressions:
+        print("[OK] No regressions against baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())